@@ -1,4 +1,5 @@
 import reflex as rx
+import os
 from app.states.chat_state import ChatState
 from app.components.header_section import header_section
 from app.components.greeting_section import greeting_section
@@ -6,6 +7,8 @@ from app.components.input_section import input_section
 from app.components.suggestions_section import suggestions_section
 from app.pages.chat_page import chat_page
 
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
 
 def index() -> rx.Component:
     return rx.el.div(
@@ -21,6 +24,8 @@ def index() -> rx.Component:
 
 
 from app.pages.image_page import image_page
+from app.states.image_state import ImageGenerationState
+from app.services import gateway, metrics
 
 app = rx.App(
     theme=rx.theme(appearance="light"),
@@ -29,6 +34,11 @@ app = rx.App(
         "https://fonts.googleapis.com/css2?family=Lora:wght@400;500;700&display=swap",
     ],
 )
+app.register_lifespan_task(gateway.lifespan)
+if METRICS_ENABLED:
+    app.api.add_api_route("/metrics", metrics.metrics_endpoint, methods=["GET"])
 app.add_page(index)
-app.add_page(chat_page, route="/chat")
-app.add_page(image_page, route="/generate")
\ No newline at end of file
+app.add_page(chat_page, route="/chat", on_load=ChatState.load_conversations)
+app.add_page(
+    image_page, route="/generate", on_load=ImageGenerationState.load_image_history
+)
\ No newline at end of file
@@ -25,11 +25,20 @@ def chat_input_bar() -> rx.Component:
                     max_height="25vh",
                     enter_key_submit=True,
                 ),
-                rx.el.button(
-                    rx.icon("arrow-up", size=20, class_name="text-white"),
-                    type="submit",
-                    class_name="p-2 bg-[#E97055] hover:bg-[#d3654c] rounded-md aspect-square h-10 w-10 flex items-center justify-center",
-                    is_disabled=ChatState.is_streaming,
+                rx.cond(
+                    ChatState.is_streaming,
+                    rx.el.button(
+                        rx.icon("square", size=16, class_name="text-white fill-white"),
+                        type="button",
+                        on_click=ChatState.stop_streaming,
+                        title="Stop generating",
+                        class_name="p-2 bg-[#E97055] hover:bg-[#d3654c] rounded-md aspect-square h-10 w-10 flex items-center justify-center",
+                    ),
+                    rx.el.button(
+                        rx.icon("arrow-up", size=20, class_name="text-white"),
+                        type="submit",
+                        class_name="p-2 bg-[#E97055] hover:bg-[#d3654c] rounded-md aspect-square h-10 w-10 flex items-center justify-center",
+                    ),
                 ),
                 class_name="bg-[#2A2B2E] rounded-xl shadow-lg w-full flex items-center p-2 gap-2",
             ),
@@ -1,5 +1,7 @@
 import reflex as rx
 from app.states.chat_state import ChatState, Message
+from app.services.image_store import image_src
+from app.components.markdown_content import markdown_block, streaming_markdown
 
 
 def user_message_bubble(message_content: str) -> rx.Component:
@@ -33,10 +35,10 @@ def _tool_call_ui(message: Message) -> rx.Component:
                 class_name="mt-3 p-4 flex justify-center items-center",
             ),
             rx.cond(
-                message.get("image_b64") != None,
+                message.get("image_url") != None,
                 rx.el.div(
                     rx.el.img(
-                        src=message["image_b64"],
+                        src=image_src(message["image_url"]),
                         class_name="rounded-lg mt-2 max-w-full h-auto",
                     ),
                     class_name="mt-2",
@@ -47,7 +49,7 @@ def _tool_call_ui(message: Message) -> rx.Component:
     )
 
 
-def ai_message_bubble(message: Message) -> rx.Component:
+def ai_message_bubble(message: Message, body: rx.Component) -> rx.Component:
     is_initial = message["is_initial_greeting"]
     return rx.el.div(
         rx.el.div(
@@ -63,17 +65,16 @@ def ai_message_bubble(message: Message) -> rx.Component:
                 ),
             ),
             rx.el.div(
-                rx.el.p(
-                    message["content"],
+                rx.el.div(
+                    body,
                     class_name=rx.cond(
-                        is_initial,
-                        "font-medium text-neutral-100 whitespace-pre-wrap break-words leading-relaxed",
-                        "text-neutral-200 whitespace-pre-wrap break-words leading-relaxed",
+                        is_initial, "font-medium [&>*]:text-neutral-100", ""
                     ),
                 ),
                 _tool_call_ui(message),
                 rx.cond(
-                    is_initial == False,
+                    is_initial,
+                    rx.el.div(),
                     rx.el.div(
                         rx.el.div(
                             rx.icon(
@@ -91,6 +92,18 @@ def ai_message_bubble(message: Message) -> rx.Component:
                                 size=18,
                                 class_name="text-neutral-400 hover:text-neutral-200 cursor-pointer p-1",
                             ),
+                            rx.cond(
+                                message.get("model", None)
+                                & (
+                                    message.get("model", None)
+                                    != ChatState.selected_model
+                                ),
+                                rx.el.span(
+                                    message["model"],
+                                    class_name="text-xs text-neutral-500",
+                                ),
+                                None,
+                            ),
                             class_name="flex items-center space-x-2",
                         ),
                         rx.el.p(
@@ -99,7 +112,6 @@ def ai_message_bubble(message: Message) -> rx.Component:
                         ),
                         class_name="flex flex-wrap items-center justify-between mt-3 w-full gap-2",
                     ),
-                    rx.el.div(),
                 ),
                 class_name="bg-[#2A2B2E] p-3 rounded-lg shadow flex-grow min-w-0",
             ),
@@ -109,9 +121,27 @@ def ai_message_bubble(message: Message) -> rx.Component:
     )
 
 
-def chat_message_bubble_component(message: Message, index: int) -> rx.Component:
+def chat_message_bubble_component(message: Message) -> rx.Component:
+    return rx.match(
+        message["role"],
+        ("user", user_message_bubble(message["content"])),
+        ("tool", rx.fragment()),
+        ai_message_bubble(message, markdown_block(content=message["content"])),
+    )
+
+
+def in_flight_message_bubble() -> rx.Component:
+    message = ChatState.in_flight.to(Message)
     return rx.cond(
-        message["role"] == "user",
-        user_message_bubble(message["content"]),
-        ai_message_bubble(message),
+        ChatState.in_flight,
+        ai_message_bubble(
+            message,
+            rx.cond(
+                (ChatState.streaming_content != "")
+                | (ChatState.streaming_blocks.length() > 0),
+                streaming_markdown(),
+                markdown_block(content=message["content"]),
+            ),
+        ),
+        None,
     )
\ No newline at end of file
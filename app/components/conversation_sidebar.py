@@ -0,0 +1,45 @@
+import reflex as rx
+from app.states.chat_state import ChatState
+from app.services.persistence import ConversationSummary
+
+
+def conversation_item(conversation: ConversationSummary) -> rx.Component:
+    return rx.el.button(
+        rx.icon("message-square", size=14, class_name="shrink-0 text-neutral-500"),
+        rx.el.span(conversation["title"], class_name="truncate"),
+        on_click=ChatState.open_conversation(conversation["id"]),
+        type="button",
+        class_name=rx.cond(
+            conversation["id"] == ChatState.conversation_id,
+            "flex items-center gap-2 w-full text-left text-sm px-3 py-2 rounded-md bg-[#3a3b3e] text-neutral-100",
+            "flex items-center gap-2 w-full text-left text-sm px-3 py-2 rounded-md text-neutral-300 hover:bg-[#2A2B2E]",
+        ),
+    )
+
+
+def conversation_sidebar() -> rx.Component:
+    return rx.el.aside(
+        rx.el.button(
+            rx.icon("plus", size=16, class_name="mr-1"),
+            "New chat",
+            on_click=ChatState.new_conversation,
+            disabled=ChatState.is_streaming,
+            type="button",
+            class_name="flex items-center justify-center w-full text-sm font-medium px-3 py-2 mb-3 rounded-md bg-[#2A2B2E] text-neutral-200 hover:bg-[#3a3b3e] disabled:opacity-50",
+        ),
+        rx.el.div(
+            rx.foreach(ChatState.conversations, conversation_item),
+            rx.cond(
+                ChatState.has_more_conversations,
+                rx.el.button(
+                    "Load more",
+                    on_click=ChatState.load_more_conversations,
+                    type="button",
+                    class_name="w-full text-xs text-neutral-400 hover:text-neutral-200 py-2",
+                ),
+                None,
+            ),
+            class_name="flex flex-col gap-1 overflow-y-auto",
+        ),
+        class_name="hidden md:flex flex-col w-64 shrink-0 p-3 border-r border-neutral-700 bg-[#1A1B1D] overflow-hidden",
+    )
\ No newline at end of file
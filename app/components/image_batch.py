@@ -0,0 +1,59 @@
+import reflex as rx
+from app.states.image_state import BatchVariant, ImageGenerationState
+from app.services.image_store import image_src
+
+
+def batch_variant_card(variant: BatchVariant) -> rx.Component:
+    return rx.el.div(
+        rx.match(
+            variant["status"],
+            (
+                "loading",
+                rx.el.div(
+                    rx.icon(
+                        "loader-circle",
+                        class_name="animate-spin text-[#E97055] w-8 h-8 mx-auto",
+                    ),
+                    class_name="flex items-center justify-center w-full aspect-square bg-[#2A2B2E] rounded-lg border-2 border-dashed border-neutral-600",
+                ),
+            ),
+            (
+                "queued",
+                rx.el.div(
+                    rx.icon("clock", class_name="text-neutral-500 w-8 h-8 mx-auto"),
+                    rx.el.p(
+                        f"Queued, position {variant['queue_position']}",
+                        class_name="text-xs text-neutral-400 text-center mt-2",
+                    ),
+                    class_name="flex flex-col items-center justify-center w-full aspect-square bg-[#2A2B2E] rounded-lg border-2 border-dashed border-neutral-600",
+                ),
+            ),
+            (
+                "error",
+                rx.el.div(
+                    rx.icon(
+                        "triangle-alert", class_name="text-red-500 w-8 h-8 mx-auto"
+                    ),
+                    rx.el.p(
+                        variant["error"],
+                        class_name="text-xs text-red-400 text-center mt-2 px-3 line-clamp-3",
+                    ),
+                    class_name="flex flex-col items-center justify-center w-full aspect-square bg-red-900/20 rounded-lg",
+                ),
+            ),
+            rx.el.img(
+                src=image_src(variant["image_url"]),
+                decoding="async",
+                class_name="w-full aspect-square object-contain bg-black rounded-lg",
+            ),
+        ),
+        rx.el.p(variant["label"], class_name="text-xs text-neutral-400 mt-2 truncate"),
+        class_name="flex flex-col",
+    )
+
+
+def image_batch_grid() -> rx.Component:
+    return rx.el.div(
+        rx.foreach(ImageGenerationState.batch_results, batch_variant_card),
+        class_name="grid grid-cols-1 sm:grid-cols-2 gap-4 w-full mb-12",
+    )
\ No newline at end of file
@@ -1,5 +1,6 @@
 import reflex as rx
-from app.states.image_state import ImageGenerationState, GeneratedImage
+from app.states.image_state import ImageGenerationState
+from app.services.image_store import image_src
 
 
 def image_display() -> rx.Component:
@@ -15,19 +16,27 @@ def image_display() -> rx.Component:
                     "Generating your image...",
                     class_name="text-center text-neutral-400 mt-4",
                 ),
+                rx.cond(
+                    ImageGenerationState.queue_position > 0,
+                    rx.el.p(
+                        f"Waiting for a free slot, position {ImageGenerationState.queue_position} in queue",
+                        class_name="text-xs text-neutral-500 text-center mt-2",
+                    ),
+                    None,
+                ),
                 class_name="flex flex-col items-center justify-center bg-[#2A2B2E] rounded-xl w-full aspect-square border-2 border-dashed border-neutral-600",
             ),
             rx.cond(
                 ImageGenerationState.latest_image,
                 rx.el.div(
                     rx.el.img(
-                        src=ImageGenerationState.latest_image.image_b64,
+                        src=image_src(ImageGenerationState.latest_image.image_url),
                         class_name="rounded-lg object-contain w-full h-full",
                     ),
                     rx.el.a(
                         rx.icon("download", size=20),
                         "Download",
-                        href=ImageGenerationState.latest_image.image_b64,
+                        href=image_src(ImageGenerationState.latest_image.image_url),
                         download=f"generated_image_{ImageGenerationState.latest_image.timestamp}.png",
                         class_name="absolute bottom-3 right-3 flex items-center gap-2 bg-[#2A2B2E] text-white px-3 py-1.5 rounded-lg text-sm font-medium hover:bg-[#3a3b3e] transition-colors",
                     ),
@@ -1,18 +1,55 @@
 import reflex as rx
 from app.states.image_state import GeneratedImage, ImageGenerationState
+from app.services.image_store import image_src
 
 
 def image_history_item(image: GeneratedImage) -> rx.Component:
     return rx.el.div(
         rx.el.img(
-            src=image.image_b64,
+            src=image_src(image.thumbnail_url),
+            loading="lazy",
+            decoding="async",
+            width=256,
+            height=256,
             class_name="aspect-square w-full rounded-lg object-cover group-hover:opacity-80 transition-opacity",
         ),
         rx.el.div(
             rx.el.p(image.prompt, class_name="text-xs text-neutral-200 truncate"),
             class_name="absolute bottom-0 left-0 right-0 bg-black/50 p-2",
         ),
-        class_name="relative group overflow-hidden rounded-lg",
+        on_click=ImageGenerationState.select_image(image),
+        class_name="relative group overflow-hidden rounded-lg cursor-pointer",
+    )
+
+
+def _history_pager() -> rx.Component:
+    return rx.cond(
+        ImageGenerationState.history_page_count > 1,
+        rx.el.div(
+            rx.el.button(
+                rx.icon("chevron-left", size=16),
+                "Newer",
+                on_click=ImageGenerationState.show_newer_images,
+                disabled=ImageGenerationState.history_page == 0,
+                type="button",
+                class_name="flex items-center gap-1 text-sm px-3 py-1.5 rounded-lg bg-[#40414F] text-neutral-300 hover:bg-[#50515f] disabled:opacity-50",
+            ),
+            rx.el.span(
+                f"Page {ImageGenerationState.history_page + 1} of {ImageGenerationState.history_page_count}",
+                class_name="text-xs text-neutral-400",
+            ),
+            rx.el.button(
+                "Older",
+                rx.icon("chevron-right", size=16),
+                on_click=ImageGenerationState.show_older_images,
+                disabled=ImageGenerationState.history_page + 1
+                >= ImageGenerationState.history_page_count,
+                type="button",
+                class_name="flex items-center gap-1 text-sm px-3 py-1.5 rounded-lg bg-[#40414F] text-neutral-300 hover:bg-[#50515f] disabled:opacity-50",
+            ),
+            class_name="flex items-center justify-between mt-4",
+        ),
+        None,
     )
 
 
@@ -20,11 +57,9 @@ def image_history() -> rx.Component:
     return rx.el.div(
         rx.el.h3("History", class_name="text-lg font-['Lora'] text-neutral-100 mb-4"),
         rx.cond(
-            ImageGenerationState.image_history.length() > 0,
+            ImageGenerationState.visible_history.length() > 0,
             rx.el.div(
-                rx.foreach(
-                    ImageGenerationState.image_history.reverse(), image_history_item
-                ),
+                rx.foreach(ImageGenerationState.visible_history, image_history_item),
                 class_name="grid grid-cols-2 md:grid-cols-3 gap-4",
             ),
             rx.el.p(
@@ -32,5 +67,6 @@ def image_history() -> rx.Component:
                 class_name="text-neutral-500 text-center py-4",
             ),
         ),
+        _history_pager(),
         class_name="w-full",
     )
\ No newline at end of file
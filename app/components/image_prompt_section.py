@@ -28,7 +28,7 @@ def image_prompt_section() -> rx.Component:
                 "Generate Image",
                 type="submit",
                 class_name="w-full flex items-center justify-center gap-2 py-3 px-4 bg-[#E97055] hover:bg-[#d3654c] rounded-lg font-semibold text-white disabled:opacity-50 disabled:cursor-not-allowed transition-colors",
-                is_disabled=ImageGenerationState.is_generating,
+                disabled=ImageGenerationState.is_generating,
             ),
             class_name="bg-[#353740] rounded-xl shadow-lg w-full flex flex-col p-6 space-y-6",
         ),
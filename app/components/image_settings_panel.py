@@ -76,7 +76,82 @@ def _quality_slider() -> rx.Component:
     )
 
 
+def _batch_selector() -> rx.Component:
+    return rx.el.div(
+        rx.el.label(
+            "Variants", class_name="block text-sm font-medium text-neutral-300 mb-2"
+        ),
+        rx.el.div(
+            rx.foreach(
+                ImageGenerationState.batch_sizes,
+                lambda size: rx.el.button(
+                    size.to_string(),
+                    on_click=lambda: ImageGenerationState.set_batch_size(size),
+                    class_name=rx.cond(
+                        ImageGenerationState.batch_size == size,
+                        "text-sm px-4 py-1.5 rounded-lg bg-[#E97055] text-white",
+                        "text-sm px-4 py-1.5 rounded-lg bg-[#40414F] text-neutral-300 hover:bg-[#50515f]",
+                    ),
+                    disabled=ImageGenerationState.compare_models.length() > 0,
+                    type="button",
+                ),
+            ),
+            class_name="flex items-center gap-2",
+        ),
+        class_name="w-full",
+    )
+
+
+def _compare_models_selector() -> rx.Component:
+    return rx.el.div(
+        rx.el.label(
+            "Compare models",
+            class_name="block text-sm font-medium text-neutral-300 mb-2",
+        ),
+        rx.el.div(
+            rx.foreach(
+                ImageGenerationState.compare_model_options,
+                lambda model: rx.el.button(
+                    model,
+                    on_click=lambda: ImageGenerationState.toggle_compare_model(model),
+                    class_name=rx.cond(
+                        ImageGenerationState.compare_models.contains(model),
+                        "text-xs px-3 py-1.5 rounded-lg bg-[#E97055] text-white",
+                        "text-xs px-3 py-1.5 rounded-lg bg-[#40414F] text-neutral-300 hover:bg-[#50515f]",
+                    ),
+                    type="button",
+                ),
+            ),
+            class_name="flex flex-wrap gap-2",
+        ),
+        class_name="w-full",
+    )
+
+
+def _cache_toggle() -> rx.Component:
+    return rx.cond(
+        ImageGenerationState.cache_enabled,
+        rx.el.label(
+            rx.el.input(
+                type="checkbox",
+                checked=ImageGenerationState.bypass_cache,
+                on_change=ImageGenerationState.toggle_bypass_cache,
+                class_name="accent-[#E97055] mr-2",
+            ),
+            "Bypass cache",
+            class_name="flex items-center text-sm font-medium text-neutral-300 cursor-pointer",
+        ),
+        None,
+    )
+
+
 def image_settings_panel() -> rx.Component:
     return rx.el.div(
-        _style_selector(), _size_selector(), _quality_slider(), class_name="space-y-6"
+        _style_selector(),
+        _size_selector(),
+        _quality_slider(),
+        _batch_selector(),
+        _compare_models_selector(),
+        _cache_toggle(),
+        class_name="space-y-6",
     )
\ No newline at end of file
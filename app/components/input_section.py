@@ -1,4 +1,5 @@
 import reflex as rx
+from app.services import speculation
 from app.states.chat_state import ChatState
 
 
@@ -11,6 +12,11 @@ def input_section() -> rx.Component:
                 class_name="w-full bg-transparent text-neutral-300 placeholder-neutral-500 focus:outline-none resize-none text-lg p-4 min-h-[80px]",
                 rows=3,
                 enter_key_submit=True,
+                on_change=ChatState.speculate_prompt.debounce(
+                    speculation.SPECULATION_DEBOUNCE_MS
+                )
+                if speculation.SPECULATION_ENABLED
+                else None,
             ),
             rx.el.div(
                 rx.el.div(
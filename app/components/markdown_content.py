@@ -0,0 +1,58 @@
+import reflex as rx
+from app.states.chat_state import ChatState
+
+MARKDOWN_CLASS = "text-neutral-200 break-words leading-relaxed [&_table]:my-2 [&_table]:w-full [&_table]:text-sm [&_th]:border [&_th]:border-neutral-600 [&_th]:px-2 [&_th]:py-1 [&_th]:text-left [&_td]:border [&_td]:border-neutral-700 [&_td]:px-2 [&_td]:py-1 [&_blockquote]:border-l-2 [&_blockquote]:border-neutral-500 [&_blockquote]:pl-3 [&_blockquote]:text-neutral-400"
+CODE_BLOCK_CLASS = "my-2 rounded-md text-sm overflow-x-auto"
+
+BASE_COMPONENTS = {
+    "h1": lambda text: rx.el.h1(text, class_name="text-xl font-semibold mt-4 mb-2"),
+    "h2": lambda text: rx.el.h2(text, class_name="text-lg font-semibold mt-4 mb-2"),
+    "h3": lambda text: rx.el.h3(text, class_name="font-semibold mt-3 mb-1"),
+    "p": lambda text: rx.el.p(text, class_name="my-2 first:mt-0 last:mb-0"),
+    "ul": lambda text: rx.el.ul(text, class_name="list-disc pl-6 my-2 space-y-1"),
+    "ol": lambda text: rx.el.ol(text, class_name="list-decimal pl-6 my-2 space-y-1"),
+    "li": lambda text: rx.el.li(text),
+    "a": lambda text: rx.el.a(
+        text, class_name="text-[#E97055] underline", target="_blank"
+    ),
+    "code": lambda text: rx.el.code(
+        text, class_name="bg-[#1e1f22] text-[#E97055] px-1 py-0.5 rounded text-sm"
+    ),
+}
+HIGHLIGHTED_COMPONENTS = {
+    **BASE_COMPONENTS,
+    "codeblock": lambda text, **props: rx.code_block(
+        text,
+        theme=rx.code_block.themes.one_dark,
+        wrap_long_lines=True,
+        class_name=CODE_BLOCK_CLASS,
+        **props,
+    ),
+}
+PLAIN_COMPONENTS = {
+    **BASE_COMPONENTS,
+    "codeblock": lambda text, **props: rx.el.pre(
+        rx.el.code(text),
+        class_name=f"{CODE_BLOCK_CLASS} bg-[#282c34] text-neutral-200 p-4 whitespace-pre-wrap",
+    ),
+}
+
+
+@rx.memo
+def markdown_block(content: rx.Var[str]) -> rx.Component:
+    return rx.markdown(
+        content, component_map=HIGHLIGHTED_COMPONENTS, class_name=MARKDOWN_CLASS
+    )
+
+
+def streaming_markdown() -> rx.Component:
+    return rx.el.div(
+        rx.foreach(
+            ChatState.streaming_blocks, lambda block: markdown_block(content=block)
+        ),
+        rx.markdown(
+            ChatState.streaming_content,
+            component_map=PLAIN_COMPONENTS,
+            class_name=MARKDOWN_CLASS,
+        ),
+    )
\ No newline at end of file
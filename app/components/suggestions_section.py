@@ -1,4 +1,5 @@
 import reflex as rx
+from app.services import speculation
 from app.states.chat_state import ChatState
 
 
@@ -7,6 +8,14 @@ def suggestion_chip(icon_name: str, text: str) -> rx.Component:
         rx.icon(icon_name, size=18, class_name="mr-2 text-neutral-300"),
         rx.el.span(text, class_name="text-sm text-neutral-200"),
         on_click=lambda: ChatState.submit_suggestion_as_prompt(text),
+        on_mouse_enter=ChatState.speculate_suggestion(text).debounce(
+            speculation.SPECULATION_DEBOUNCE_MS
+        )
+        if speculation.SPECULATION_ENABLED
+        else None,
+        on_focus=ChatState.speculate_suggestion(text)
+        if speculation.SPECULATION_ENABLED
+        else None,
         type="button",
         class_name="bg-[#2A2B2E] px-4 py-2 rounded-lg flex items-center hover:bg-[#3a3b3e] transition-colors",
     )
@@ -0,0 +1,50 @@
+import reflex as rx
+import sqlalchemy
+import sqlmodel
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+class Conversation(rx.Model, table=True):
+    __table_args__ = (
+        sqlalchemy.Index("ix_conversation_owner_updated", "owner_id", "updated_at"),
+    )
+
+    owner_id: str
+    title: str = ""
+    model: str = ""
+    created_at: datetime = sqlmodel.Field(default_factory=_utcnow)
+    updated_at: datetime = sqlmodel.Field(default_factory=_utcnow)
+
+
+class ChatMessage(rx.Model, table=True):
+    __table_args__ = (
+        sqlalchemy.Index(
+            "ix_chatmessage_conversation_created", "conversation_id", "created_at"
+        ),
+    )
+
+    conversation_id: int = sqlmodel.Field(foreign_key="conversation.id")
+    role: str
+    content: str = ""
+    image_url: Optional[str] = None
+    tool_call_info: Optional[str] = None
+    tool_call_status: Optional[str] = None
+    model: Optional[str] = None
+    created_at: datetime = sqlmodel.Field(default_factory=_utcnow)
+
+
+class ImageRecord(rx.Model, table=True):
+    __table_args__ = (
+        sqlalchemy.Index("ix_imagerecord_owner_created", "owner_id", "created_at"),
+    )
+
+    owner_id: str
+    prompt: str
+    image_url: str
+    thumbnail_url: str
+    created_at: datetime = sqlmodel.Field(default_factory=_utcnow)
\ No newline at end of file
@@ -1,7 +1,11 @@
 import reflex as rx
 from app.states.chat_state import ChatState
-from app.components.chat_message_bubble import chat_message_bubble_component
+from app.components.chat_message_bubble import (
+    chat_message_bubble_component,
+    in_flight_message_bubble,
+)
 from app.components.chat_input_bar import chat_input_bar
+from app.components.conversation_sidebar import conversation_sidebar
 
 
 def _chat_page_header() -> rx.Component:
@@ -31,39 +35,52 @@ def chat_page() -> rx.Component:
     return rx.el.div(
         _chat_page_header(),
         rx.el.div(
+            conversation_sidebar(),
             rx.el.div(
-                rx.el.div(class_name="pt-4"),
-                rx.foreach(
-                    ChatState.messages,
-                    lambda msg, idx: chat_message_bubble_component(msg, idx),
-                ),
-                rx.cond(
-                    ChatState.is_streaming,
+                rx.el.div(
                     rx.el.div(
-                        rx.icon(
-                            "loader-circle",
-                            class_name="animate-spin text-[#E97055] w-6 h-6 mx-auto",
+                        rx.el.div(class_name="pt-4"),
+                        rx.foreach(ChatState.messages, chat_message_bubble_component),
+                        in_flight_message_bubble(),
+                        rx.cond(
+                            ChatState.is_streaming,
+                            rx.el.div(
+                                rx.icon(
+                                    "loader-circle",
+                                    class_name="animate-spin text-[#E97055] w-6 h-6 mx-auto",
+                                ),
+                                rx.cond(
+                                    ChatState.queue_position > 0,
+                                    rx.el.p(
+                                        f"Waiting for a free slot, position {ChatState.queue_position} in queue",
+                                        class_name="text-xs text-neutral-400 text-center mt-2",
+                                    ),
+                                    None,
+                                ),
+                                class_name="py-4",
+                            ),
+                            rx.el.div(),
                         ),
-                        class_name="py-4",
-                    ),
-                    rx.el.div(),
-                ),
-                rx.cond(
-                    ChatState.error_message != "",
-                    rx.el.div(
-                        rx.el.p(
-                            ChatState.error_message,
-                            class_name="text-red-500 text-sm text-center bg-red-900/30 p-3 rounded-md",
+                        rx.cond(
+                            ChatState.error_message != "",
+                            rx.el.div(
+                                rx.el.p(
+                                    ChatState.error_message,
+                                    class_name="text-red-500 text-sm text-center bg-red-900/30 p-3 rounded-md",
+                                ),
+                                class_name="py-2",
+                            ),
+                            rx.el.div(),
                         ),
-                        class_name="py-2",
+                        rx.el.div(class_name="pb-4"),
+                        class_name="w-full max-w-4xl mx-auto px-3 sm:px-4 md:px-6 lg:px-8 flex flex-col space-y-4 sm:space-y-6",
                     ),
-                    rx.el.div(),
+                    class_name="flex-grow overflow-y-auto",
                 ),
-                rx.el.div(class_name="pb-4"),
-                class_name="w-full max-w-4xl mx-auto px-3 sm:px-4 md:px-6 lg:px-8 flex flex-col space-y-4 sm:space-y-6",
+                chat_input_bar(),
+                class_name="flex flex-col flex-grow min-w-0",
             ),
-            class_name="flex-grow overflow-y-auto",
+            class_name="flex flex-grow min-h-0",
         ),
-        chat_input_bar(),
         class_name="flex flex-col h-screen bg-[#202123] text-neutral-200 font-['Inter'] selection:bg-[#E97055] selection:text-white",
     )
\ No newline at end of file
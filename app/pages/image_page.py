@@ -2,6 +2,7 @@ import reflex as rx
 from app.states.image_state import ImageGenerationState
 from app.components.image_prompt_section import image_prompt_section
 from app.components.image_display import image_display
+from app.components.image_batch import image_batch_grid
 from app.components.image_history import image_history
 
 
@@ -40,7 +41,11 @@ def image_page() -> rx.Component:
                 class_name="w-full lg:w-2/5 xl:w-1/3 flex-shrink-0 lg:pr-8",
             ),
             rx.el.div(
-                image_display(),
+                rx.cond(
+                    ImageGenerationState.batch_results.length() > 1,
+                    image_batch_grid(),
+                    image_display(),
+                ),
                 image_history(),
                 class_name="w-full lg:w-3/5 xl:w-2/3 flex-shrink-0 lg:overflow-y-auto lg:pl-8",
             ),
@@ -0,0 +1,76 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from app.services import metrics
+
+CACHE_HITS = metrics.counter("cache_hits_total", "Cache lookups that found an entry.")
+CACHE_MISSES = metrics.counter(
+    "cache_misses_total", "Cache lookups that found no live entry."
+)
+CACHE_EVICTIONS = metrics.counter(
+    "cache_evictions_total", "Entries evicted for size or expiry."
+)
+
+
+class TTLCache:
+    def __init__(
+        self,
+        name: str,
+        max_size: int,
+        ttl: float,
+        sizeof: Callable[[Any], int] = lambda value: 1,
+    ):
+        self.name = name
+        self.max_size = max_size
+        self.ttl = ttl
+        self.sizeof = sizeof
+        self.size = 0
+        self._entries: OrderedDict[Hashable, tuple[float, int, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                CACHE_MISSES.inc(cache=self.name)
+                return None
+            self._entries.move_to_end(key)
+        CACHE_HITS.inc(cache=self.name)
+        return entry[2]
+
+    def peek(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[2]
+
+    def set(self, key: Hashable, value: Any):
+        size = self.sizeof(value)
+        if size > self.max_size:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, value)
+            self.size += size
+            while self.size > self.max_size:
+                self._remove(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _remove(self, key: Hashable):
+        _, size, _ = self._entries.pop(key)
+        self.size -= size
+        CACHE_EVICTIONS.inc(cache=self.name)
\ No newline at end of file
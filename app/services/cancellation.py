@@ -0,0 +1,198 @@
+import asyncio
+import contextlib
+import logging
+import os
+import time
+from typing import AsyncIterator, Awaitable, TypeVar
+
+from app.services import metrics
+
+T = TypeVar("T")
+
+USER = "user"
+CLEARED = "cleared"
+DISCONNECTED = "disconnected"
+
+DISCONNECT_GRACE_SECONDS = float(os.getenv("STREAM_DISCONNECT_GRACE_SECONDS", "5"))
+DISCONNECT_POLL_SECONDS = 1.0
+REMOTE_CANCEL_TTL_SECONDS = int(os.getenv("STREAM_REMOTE_CANCEL_TTL_SECONDS", "60"))
+REMOTE_CANCEL_PREFIX = "chat:cancel:"
+
+STREAMS_CANCELLED = metrics.counter(
+    "chat_streams_cancelled_total",
+    "Chat streams aborted before completion, by reason.",
+)
+
+
+class StreamCancelled(Exception):
+    def __init__(self, reason: str):
+        super().__init__(f"Stream cancelled ({reason})")
+        self.reason = reason
+
+
+class CancelToken:
+    def __init__(self, stream_id: str):
+        self.stream_id = stream_id
+        self.reason = ""
+        self._event = asyncio.Event()
+        self._watchdog: asyncio.Task | None = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self, reason: str):
+        if not self.cancelled:
+            self.reason = reason
+            self._event.set()
+
+    def check(self):
+        if self.cancelled:
+            raise StreamCancelled(self.reason)
+
+    async def guard(self, events: AsyncIterator[T]) -> AsyncIterator[T]:
+        waiter = asyncio.ensure_future(self._event.wait())
+        try:
+            while True:
+                next_event = asyncio.ensure_future(anext(events))
+                await asyncio.wait(
+                    {next_event, waiter}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not next_event.done():
+                    next_event.cancel()
+                    with contextlib.suppress(asyncio.CancelledError, Exception):
+                        await next_event
+                    raise StreamCancelled(self.reason)
+                try:
+                    yield next_event.result()
+                except StopAsyncIteration:
+                    return
+        finally:
+            waiter.cancel()
+            await events.aclose()
+
+    async def run(self, awaitable: Awaitable[T]) -> T:
+        task = asyncio.ensure_future(awaitable)
+        waiter = asyncio.ensure_future(self._event.wait())
+        try:
+            await asyncio.wait({task, waiter}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiter.cancel()
+        if task.done():
+            return task.result()
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError, Exception):
+            await task
+        raise StreamCancelled(self.reason)
+
+    def watch_client(self, client_token: str):
+        self._watchdog = asyncio.create_task(self._watch_client(client_token))
+
+    async def _watch_client(self, client_token: str):
+        disconnected_for = 0.0
+        while not self.cancelled:
+            await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+            if reason := await _remote_cancel_reason(self.stream_id):
+                self.cancel(reason)
+                break
+            if client_connected(client_token):
+                disconnected_for = 0.0
+                continue
+            disconnected_for += DISCONNECT_POLL_SECONDS
+            if disconnected_for >= DISCONNECT_GRACE_SECONDS:
+                self.cancel(DISCONNECTED)
+
+    def close(self):
+        if self._watchdog is not None:
+            self._watchdog.cancel()
+
+
+_tokens: dict[str, CancelToken] = {}
+_requested: dict[str, tuple[str, float]] = {}
+_redis = None
+_pending: set[asyncio.Task] = set()
+
+
+def _get_redis():
+    global _redis
+    if _redis is None:
+        from reflex.utils.prerequisites import get_redis
+
+        _redis = get_redis() or False
+    return _redis or None
+
+
+async def _remote_cancel_reason(stream_id: str) -> str:
+    redis = _get_redis()
+    if redis is None:
+        return ""
+    try:
+        reason = await redis.get(REMOTE_CANCEL_PREFIX + stream_id)
+    except Exception as e:
+        logging.warning(f"Could not check remote cancellation: {e!r}")
+        return ""
+    return reason.decode() if reason else ""
+
+
+async def _publish_cancel(stream_id: str, reason: str):
+    try:
+        await _get_redis().set(
+            REMOTE_CANCEL_PREFIX + stream_id, reason, ex=REMOTE_CANCEL_TTL_SECONDS
+        )
+    except Exception as e:
+        logging.warning(f"Could not publish cancellation of {stream_id}: {e!r}")
+
+
+def client_connected(client_token: str) -> bool:
+    from reflex.utils.prerequisites import get_app
+
+    try:
+        namespace = get_app().app.event_namespace
+    except Exception:
+        return True
+    if namespace is None:
+        return True
+    return client_token in namespace.token_to_sid
+
+
+def register(stream_id: str, client_token: str | None = None) -> CancelToken:
+    token = CancelToken(stream_id)
+    _tokens[stream_id] = token
+    if requested := _requested.pop(stream_id, None):
+        token.cancel(requested[0])
+    if client_token:
+        token.watch_client(client_token)
+    return token
+
+
+def release(token: CancelToken, model: str):
+    token.close()
+    _tokens.pop(token.stream_id, None)
+    if token.cancelled:
+        logging.info(f"Stream {token.stream_id} cancelled: {token.reason}")
+        STREAMS_CANCELLED.inc(model=model, reason=token.reason)
+
+
+def _request(stream_id: str, reason: str):
+    now = time.monotonic()
+    for expired in [
+        key
+        for key, (_, requested_at) in _requested.items()
+        if now - requested_at > REMOTE_CANCEL_TTL_SECONDS
+    ]:
+        del _requested[expired]
+    _requested[stream_id] = (reason, now)
+
+
+def cancel(stream_id: str, reason: str) -> bool:
+    token = _tokens.get(stream_id)
+    if token is not None:
+        token.cancel(reason)
+        return True
+    _request(stream_id, reason)
+    if _get_redis() is None:
+        return False
+    task = asyncio.create_task(_publish_cancel(stream_id, reason))
+    _pending.add(task)
+    task.add_done_callback(_pending.discard)
+    return True
\ No newline at end of file
@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+from typing import TypedDict
+
+from app.services import metrics
+
+CHARS_PER_TOKEN = 3.5
+MESSAGE_OVERHEAD_TOKENS = 4
+SUMMARY_MAX_TOKENS = 200
+SUMMARY_SNIPPET_CHARS = 80
+
+
+class ContextBudget(TypedDict):
+    context_tokens: int
+    max_output_tokens: int
+
+
+DEFAULT_CONTEXT_BUDGET = ContextBudget(context_tokens=4096, max_output_tokens=512)
+
+MODEL_CONTEXT_BUDGETS: dict[str, ContextBudget] = {
+    "@cf/meta/llama-3.1-8b-instruct-fast": ContextBudget(
+        context_tokens=7968, max_output_tokens=1024
+    ),
+    "@hf/nousresearch/hermes-2-pro-mistral-7b": ContextBudget(
+        context_tokens=24000, max_output_tokens=1024
+    ),
+    "@cf/meta/llama-3.1-8b-instruct": ContextBudget(
+        context_tokens=7968, max_output_tokens=1024
+    ),
+    "@cf/meta/llama-2-7b-chat-int8": ContextBudget(
+        context_tokens=4096, max_output_tokens=512
+    ),
+    "@cf/mistral/mistral-7b-instruct-v0.1": ContextBudget(
+        context_tokens=2824, max_output_tokens=512
+    ),
+}
+
+CONTEXT_COMPACTIONS = metrics.counter(
+    "chat_context_compactions_total",
+    "Requests whose history was compacted to fit the model context budget.",
+)
+CONTEXT_DROPPED_MESSAGES = metrics.counter(
+    "chat_context_dropped_messages_total",
+    "Messages dropped from request history by context compaction.",
+)
+
+
+def _load_budget_overrides():
+    raw = os.getenv("CHAT_CONTEXT_BUDGETS")
+    if not raw:
+        return
+    try:
+        overrides = json.loads(raw)
+    except json.JSONDecodeError:
+        logging.exception("CHAT_CONTEXT_BUDGETS is not valid JSON, ignoring it.")
+        return
+    for model_id, budget in overrides.items():
+        if isinstance(budget, int):
+            budget = {"context_tokens": budget}
+        MODEL_CONTEXT_BUDGETS[model_id] = ContextBudget(
+            **{**MODEL_CONTEXT_BUDGETS.get(model_id, DEFAULT_CONTEXT_BUDGET), **budget}
+        )
+
+
+_load_budget_overrides()
+
+
+def estimate_tokens(text: str) -> int:
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+def estimate_message_tokens(message: dict) -> int:
+    return estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def context_budget(model_id: str) -> ContextBudget:
+    return MODEL_CONTEXT_BUDGETS.get(model_id, DEFAULT_CONTEXT_BUDGET)
+
+
+def prompt_budget(model_id: str, tools: list[dict] | None = None) -> int:
+    budget = context_budget(model_id)
+    tools_tokens = estimate_tokens(json.dumps(tools)) if tools else 0
+    return budget["context_tokens"] - budget["max_output_tokens"] - tools_tokens
+
+
+def _summarize(dropped: list[dict]) -> dict | None:
+    topics = [
+        " ".join(message["content"].split())[:SUMMARY_SNIPPET_CHARS]
+        for message in dropped
+        if message["role"] == "user" and message["content"].strip()
+    ]
+    if not topics:
+        return None
+    summary = "Earlier in this conversation the user asked about: "
+    max_chars = int(SUMMARY_MAX_TOKENS * CHARS_PER_TOKEN)
+    for topic in topics:
+        if len(summary) + len(topic) + 2 > max_chars:
+            break
+        summary += f"{topic}; "
+    return {"role": "system", "content": summary.rstrip("; ")}
+
+
+def _api_content(message: dict) -> str:
+    content = message.get("content") or ""
+    if message.get("tool_call_info"):
+        content = f"{content}{message['tool_call_info']}"
+    return content
+
+
+def to_api_messages(messages: list[dict]) -> list[dict]:
+    return [
+        {"role": message["role"], "content": _api_content(message)}
+        for message in messages
+        if _api_content(message)
+    ]
+
+
+def compact_history(
+    messages: list[dict], model_id: str, tools: list[dict] | None = None
+) -> list[dict]:
+    api_messages = to_api_messages(messages)
+    budget = prompt_budget(model_id, tools)
+    system = [m for m in api_messages if m["role"] == "system"]
+    turns = [m for m in api_messages if m["role"] != "system"]
+    remaining = budget - sum(estimate_message_tokens(m) for m in system)
+    if sum(estimate_message_tokens(m) for m in turns) > remaining:
+        remaining -= SUMMARY_MAX_TOKENS + MESSAGE_OVERHEAD_TOKENS
+    kept: list[dict] = []
+    for message in reversed(turns):
+        cost = estimate_message_tokens(message)
+        if cost > remaining:
+            if not kept:
+                content = message["content"]
+                max_chars = int((remaining - MESSAGE_OVERHEAD_TOKENS) * CHARS_PER_TOKEN)
+                kept.append(
+                    {**message, "content": content[len(content) - max(0, max_chars) :]}
+                )
+            break
+        kept.append(message)
+        remaining -= cost
+    kept.reverse()
+    while len(kept) > 1 and kept[0]["role"] != "user":
+        kept.pop(0)
+    dropped = turns[: len(turns) - len(kept)]
+    if not dropped:
+        return system + kept
+    CONTEXT_COMPACTIONS.inc(model=model_id)
+    CONTEXT_DROPPED_MESSAGES.inc(len(dropped), model=model_id)
+    summary = _summarize(dropped)
+    if summary:
+        system = system + [summary]
+    return system + kept
\ No newline at end of file
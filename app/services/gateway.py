@@ -0,0 +1,168 @@
+import asyncio
+import contextlib
+import functools
+import importlib.util
+import logging
+import os
+import time
+
+import httpx
+
+from app.services import metrics, resilience
+
+GATEWAY_BASE_URL = os.getenv(
+    "CLOUDFLARE_GATEWAY_BASE_URL", "https://gateway.ai.cloudflare.com/v1"
+)
+ACCOUNT_ID = os.getenv("CLOUDFLARE_ACCOUNT_ID")
+GATEWAY_ID = os.getenv("CLOUDFLARE_AI_GATEWAY")
+TOKEN = os.getenv("CLOUDFLARE_AI_GATEWAY_TOKEN")
+MAX_CONNECTIONS = int(os.getenv("CLOUDFLARE_GATEWAY_MAX_CONNECTIONS", "100"))
+MAX_KEEPALIVE_CONNECTIONS = int(
+    os.getenv("CLOUDFLARE_GATEWAY_MAX_KEEPALIVE_CONNECTIONS", "20")
+)
+KEEPALIVE_EXPIRY = float(os.getenv("CLOUDFLARE_GATEWAY_KEEPALIVE_EXPIRY", "60"))
+STREAM_TIMEOUT = httpx.Timeout(
+    resilience.IDLE_STREAM_TIMEOUT, connect=resilience.CONNECT_TIMEOUT
+)
+CONNECT_SECONDS = metrics.histogram(
+    "gateway_connect_seconds",
+    "Time to open a new gateway connection (TCP, TLS and HTTP/2 setup).",
+    buckets=metrics.LATENCY_BUCKETS,
+)
+RESPONSE_HEADERS_SECONDS = metrics.histogram(
+    "gateway_response_headers_seconds",
+    "Time from sending a gateway request to receiving its response headers.",
+    buckets=metrics.LATENCY_BUCKETS,
+)
+IMAGE_TIMEOUT = httpx.Timeout(
+    resilience.IMAGE_TIMEOUT, connect=resilience.CONNECT_TIMEOUT
+)
+
+_client: httpx.AsyncClient | None = None
+
+
+def is_configured() -> bool:
+    return all([ACCOUNT_ID, GATEWAY_ID, TOKEN])
+
+
+def model_url(model_id: str) -> str:
+    return f"{GATEWAY_BASE_URL}/{ACCOUNT_ID}/{GATEWAY_ID}/workers-ai/{model_id}"
+
+
+def _trace(model_id: str):
+    marks: dict[str, float] = {}
+
+    async def trace(event_name: str, info: dict):
+        now = time.perf_counter()
+        if event_name == "connection.connect_tcp.started":
+            marks["connect"] = now
+        elif event_name.endswith(".send_request_headers.started"):
+            if "connect" in marks:
+                CONNECT_SECONDS.observe(now - marks.pop("connect"), model=model_id)
+            marks["sent"] = now
+        elif event_name.endswith(".receive_response_headers.complete"):
+            if "sent" in marks:
+                RESPONSE_HEADERS_SECONDS.observe(
+                    now - marks.pop("sent"), model=model_id
+                )
+
+    return trace
+
+
+def _http2_available() -> bool:
+    return importlib.util.find_spec("h2") is not None
+
+
+def get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        http2 = _http2_available()
+        _client = httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {TOKEN}"},
+            timeout=STREAM_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=MAX_CONNECTIONS,
+                max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=KEEPALIVE_EXPIRY,
+            ),
+            http2=http2,
+        )
+        logging.info(
+            f"Created gateway client (http2={http2}, max_connections={MAX_CONNECTIONS})"
+        )
+    return _client
+
+
+async def _open_stream(
+    model_id: str, payload: dict, timeout: httpx.Timeout, first_byte_timeout: float
+) -> httpx.Response:
+    client = get_client()
+    request = client.build_request(
+        "POST",
+        model_url(model_id),
+        json=payload,
+        timeout=timeout,
+        extensions={"trace": _trace(model_id)},
+    )
+    try:
+        response = await asyncio.wait_for(
+            client.send(request, stream=True), first_byte_timeout
+        )
+    except asyncio.TimeoutError as e:
+        raise httpx.ReadTimeout(
+            f"No response from {model_id} within {first_byte_timeout}s",
+            request=request,
+        ) from e
+    if response.is_error:
+        await response.aread()
+        await response.aclose()
+        response.raise_for_status()
+    return response
+
+
+async def _discard(response: httpx.Response):
+    await response.aclose()
+
+
+@contextlib.asynccontextmanager
+async def stream(
+    model_id: str,
+    payload: dict,
+    timeout: httpx.Timeout = STREAM_TIMEOUT,
+    first_byte_timeout: float = resilience.FIRST_BYTE_TIMEOUT,
+    hedge_delay: float = 0,
+):
+    resilience.check_breaker(model_id)
+    open_stream = functools.partial(
+        resilience.with_retries,
+        model_id,
+        functools.partial(_open_stream, model_id, payload, timeout, first_byte_timeout),
+    )
+    if hedge_delay > 0:
+        response = await resilience.hedged(
+            open_stream, hedge_delay, model_id, discard=_discard
+        )
+    else:
+        response = await open_stream()
+    try:
+        yield response
+    except httpx.TransportError:
+        resilience.get_breaker(model_id).record_failure()
+        raise
+    finally:
+        await response.aclose()
+
+
+async def aclose():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+@contextlib.asynccontextmanager
+async def lifespan():
+    try:
+        yield
+    finally:
+        await aclose()
\ No newline at end of file
@@ -0,0 +1,37 @@
+import os
+
+from app.services.cache import TTLCache
+from app.services.image_store import StoredImage
+
+IMAGE_CACHE_ENABLED = os.getenv("IMAGE_CACHE_ENABLED", "false").lower() == "true"
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+IMAGE_CACHE_TTL = float(os.getenv("IMAGE_CACHE_TTL", "3600"))
+
+image_cache = TTLCache(
+    "image",
+    max_size=IMAGE_CACHE_MAX_BYTES,
+    ttl=IMAGE_CACHE_TTL,
+    sizeof=lambda stored: stored["size"],
+)
+
+
+def cache_key(model_id: str, payload: dict) -> tuple:
+    return (
+        " ".join(payload["prompt"].lower().split()),
+        model_id,
+        payload.get("width"),
+        payload.get("height"),
+        payload.get("num_steps"),
+        payload.get("seed"),
+    )
+
+
+def get(model_id: str, payload: dict) -> StoredImage | None:
+    if not IMAGE_CACHE_ENABLED:
+        return None
+    return image_cache.get(cache_key(model_id, payload))
+
+
+def put(model_id: str, payload: dict, stored: StoredImage):
+    if IMAGE_CACHE_ENABLED:
+        image_cache.set(cache_key(model_id, payload), stored)
\ No newline at end of file
@@ -0,0 +1,242 @@
+import asyncio
+import logging
+import time
+from typing import TypedDict
+
+import httpx
+
+from app.services import (
+    gateway,
+    image_cache,
+    image_stream,
+    metrics,
+    persistence,
+    resilience,
+    routing,
+    scheduler,
+)
+from app.services.image_store import ImageWriter, StoredImage, get_store
+
+
+class ImageRequest(TypedDict):
+    prompt: str
+    style: str
+    model: str
+    size: str
+    steps: int
+    seed: int | None
+    use_cache: bool
+    fallback: bool
+    session: str
+
+
+class ImageResult(TypedDict):
+    prompt: str
+    image_url: str
+    thumbnail_url: str
+    timestamp: str
+    model: str
+
+
+class ImageGenerationError(Exception):
+    pass
+
+
+IMAGE_MODELS = {
+    "Leonardo Phoenix 1.0": "@cf/leonardo/phoenix-1.0",
+    "Lucid Origin": "@cf/leonardo/lucid-origin",
+    "Flux-1 Schnell": "@cf/black-forest-labs/flux-1-schnell",
+    "Dreamshaper 8 LCM": "@cf/lykon/dreamshaper-8-lcm",
+    "Stable Diffusion XL Base 1.0": "@cf/stabilityai/stable-diffusion-xl-base-1.0",
+    "Stable Diffusion XL Lightning": "@cf/bytedance/stable-diffusion-xl-lightning",
+}
+
+IMAGE_REQUEST_SECONDS = metrics.histogram(
+    "image_request_seconds",
+    "Time to produce a stored image for one request, by model and cache result.",
+    buckets=metrics.LATENCY_BUCKETS,
+)
+IMAGE_REQUESTS = metrics.counter(
+    "image_requests_total", "Image generation requests by model and outcome."
+)
+IMAGE_BYTES = metrics.histogram(
+    "image_bytes", "Size of generated images.", buckets=metrics.BYTES_BUCKETS
+)
+IMAGE_DECODE_SECONDS = metrics.histogram(
+    "image_base64_decode_seconds",
+    "Time spent base64-decoding streamed JSON image responses.",
+    buckets=metrics.LATENCY_BUCKETS,
+)
+IMAGE_STORE_SECONDS = metrics.histogram(
+    "image_store_seconds",
+    "Time to finalize a streamed image and its thumbnail in the image store.",
+    buckets=metrics.LATENCY_BUCKETS,
+)
+IMAGE_MODEL_FALLBACKS = routing.load_fallback_chains(
+    "IMAGE_MODEL_FALLBACKS",
+    {
+        "Leonardo Phoenix 1.0": ["Lucid Origin", "Flux-1 Schnell"],
+        "Lucid Origin": ["Leonardo Phoenix 1.0", "Flux-1 Schnell"],
+        "Flux-1 Schnell": ["Stable Diffusion XL Lightning"],
+        "Dreamshaper 8 LCM": ["Flux-1 Schnell"],
+        "Stable Diffusion XL Base 1.0": [
+            "Stable Diffusion XL Lightning",
+            "Flux-1 Schnell",
+        ],
+        "Stable Diffusion XL Lightning": ["Flux-1 Schnell"],
+    },
+)
+
+
+def _for_model(model_id: str, data: dict) -> dict:
+    if "leonardo" in model_id.lower():
+        return {key: value for key, value in data.items() if key != "num_steps"}
+    return data
+
+
+def _image_payload(full_prompt: str, size: str, num_steps: int) -> dict:
+    width, height = map(int, size.split("x"))
+    return {
+        "prompt": full_prompt,
+        "width": width,
+        "height": height,
+        "num_steps": num_steps,
+    }
+
+
+async def _receive_image(response: httpx.Response) -> ImageWriter:
+    content_type = response.headers.get("Content-Type", "")
+    if "image/png" in content_type or "image/jpeg" in content_type:
+        decoder = None
+    elif "application/json" in content_type:
+        decoder = image_stream.JsonImageDecoder()
+    else:
+        raise ImageGenerationError(f"Unexpected content type: {content_type}")
+    writer = await asyncio.to_thread(get_store().open_writer)
+    decode_seconds = 0.0
+    try:
+        async for chunk in response.aiter_bytes(image_stream.CHUNK_SIZE):
+            if decoder is not None:
+                started = time.perf_counter()
+                chunk = decoder.feed(chunk)
+                decode_seconds += time.perf_counter() - started
+            if chunk:
+                await asyncio.to_thread(writer.write, chunk)
+        if decoder is not None:
+            decoder.close()
+            IMAGE_DECODE_SECONDS.observe(decode_seconds)
+    except BaseException:
+        await asyncio.to_thread(writer.abort)
+        raise
+    return writer
+
+
+def _commit_image(writer: ImageWriter) -> StoredImage:
+    with IMAGE_STORE_SECONDS.time():
+        return writer.commit()
+
+
+async def _request_image(
+    model_id: str,
+    data: dict,
+    use_cache: bool = True,
+    session: str = "",
+    on_position: scheduler.PositionCallback | None = None,
+) -> StoredImage:
+    started = time.perf_counter()
+    if use_cache:
+        cached = image_cache.get(model_id, data)
+        if cached:
+            IMAGE_REQUEST_SECONDS.observe(
+                time.perf_counter() - started, model=model_id, cache="hit"
+            )
+            IMAGE_REQUESTS.inc(model=model_id, status="ok")
+            return cached
+    try:
+        async with scheduler.IMAGE_POOL.slot(session, on_position):
+            async with gateway.stream(
+                model_id,
+                data,
+                timeout=gateway.IMAGE_TIMEOUT,
+                first_byte_timeout=resilience.IMAGE_TIMEOUT,
+                hedge_delay=resilience.IMAGE_HEDGE_DELAY,
+            ) as response:
+                writer = await _receive_image(response)
+        stored = await asyncio.to_thread(_commit_image, writer)
+    except Exception:
+        IMAGE_REQUESTS.inc(model=model_id, status="error")
+        raise
+    IMAGE_REQUEST_SECONDS.observe(
+        time.perf_counter() - started, model=model_id, cache="miss"
+    )
+    IMAGE_REQUESTS.inc(model=model_id, status="ok")
+    IMAGE_BYTES.observe(stored["size"], model=model_id)
+    image_cache.put(model_id, data, stored)
+    return stored
+
+
+def full_prompt(prompt: str, style: str) -> str:
+    return f"{prompt}, {style} style"
+
+
+def model_ids(request: ImageRequest) -> list[str]:
+    if not request["fallback"]:
+        model_id = IMAGE_MODELS.get(request["model"])
+        return [model_id] if model_id else []
+    return routing.candidates(request["model"], IMAGE_MODELS, IMAGE_MODEL_FALLBACKS)
+
+
+def payload(request: ImageRequest) -> dict:
+    data = _image_payload(
+        full_prompt(request["prompt"], request["style"]),
+        request["size"],
+        request["steps"],
+    )
+    if request["seed"] is not None:
+        data["seed"] = request["seed"]
+    return data
+
+
+async def generate(
+    request: ImageRequest, on_position: scheduler.PositionCallback | None = None
+) -> ImageResult:
+    if not gateway.is_configured():
+        raise ImageGenerationError("API credentials not configured.")
+    candidates = model_ids(request)
+    if not candidates:
+        raise ImageGenerationError(f"Unknown image model: {request['model']}")
+    data = payload(request)
+    served_by = candidates[0]
+
+    async def call(model_id: str) -> StoredImage:
+        nonlocal served_by
+        served_by = model_id
+        return await _request_image(
+            model_id,
+            _for_model(model_id, data),
+            request["use_cache"],
+            request["session"],
+            on_position,
+        )
+
+    stored = await routing.call_with_fallback("image", candidates, call)
+    return ImageResult(
+        prompt=data["prompt"],
+        image_url=stored["url"],
+        thumbnail_url=stored["thumbnail_url"],
+        timestamp=str(int(time.time())),
+        model=served_by,
+    )
+
+
+def error_message(error: Exception) -> str:
+    if isinstance(error, httpx.HTTPError):
+        return f"API Error: {error}"
+    return str(error)
+
+
+async def save(owner_id: str, result: ImageResult):
+    try:
+        await persistence.add_image(owner_id, result)
+    except Exception as e:
+        logging.exception(f"Failed to save image history: {e}")
\ No newline at end of file
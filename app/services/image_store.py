@@ -0,0 +1,196 @@
+import hashlib
+import io
+import logging
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import TypedDict
+
+import reflex as rx
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+IMAGE_STORE_BACKEND = os.getenv("IMAGE_STORE_BACKEND", "local")
+IMAGE_STORE_SUBDIR = "images"
+THUMBNAIL_SIZE = int(os.getenv("IMAGE_THUMBNAIL_SIZE", "256"))
+SNIFF_BYTES = 12
+
+EXTENSIONS = {
+    "image/png": "png",
+    "image/jpeg": "jpg",
+    "image/webp": "webp",
+}
+
+
+class StoredImage(TypedDict):
+    url: str
+    thumbnail_url: str
+    content_type: str
+    size: int
+
+
+def sniff_content_type(data: bytes, default: str = "image/png") -> str:
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if data.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return default
+
+
+def make_thumbnail(data: bytes | Path, size: int = THUMBNAIL_SIZE) -> bytes | None:
+    if Image is None:
+        return None
+    source = io.BytesIO(data) if isinstance(data, bytes) else data
+    try:
+        with Image.open(source) as image:
+            image.thumbnail((size, size))
+            buffer = io.BytesIO()
+            image.save(buffer, format="WEBP", quality=80)
+            return buffer.getvalue()
+    except Exception as e:
+        logging.warning(f"Could not create thumbnail: {e}")
+        return None
+
+
+class ImageWriter(ABC):
+    @abstractmethod
+    def write(self, chunk: bytes):
+        pass
+
+    @abstractmethod
+    def commit(self) -> StoredImage:
+        pass
+
+    def abort(self):
+        pass
+
+
+class ImageStore(ABC):
+    @abstractmethod
+    def put(self, data: bytes, content_type: str) -> StoredImage:
+        pass
+
+    def open_writer(self) -> ImageWriter:
+        return BufferedImageWriter(self)
+
+
+class BufferedImageWriter(ImageWriter):
+    def __init__(self, store: ImageStore):
+        self.store = store
+        self.chunks: list[bytes] = []
+
+    def write(self, chunk: bytes):
+        self.chunks.append(chunk)
+
+    def commit(self) -> StoredImage:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return self.store.put(data, sniff_content_type(data))
+
+    def abort(self):
+        self.chunks = []
+
+
+class LocalImageWriter(ImageWriter):
+    def __init__(self, store: "LocalImageStore"):
+        self.store = store
+        fd, tmp_path = tempfile.mkstemp(dir=store.root, suffix=".tmp")
+        self.path = Path(tmp_path)
+        self.file = os.fdopen(fd, "wb")
+        self.digest = hashlib.sha256()
+        self.head = b""
+        self.size = 0
+
+    def write(self, chunk: bytes):
+        if len(self.head) < SNIFF_BYTES:
+            self.head += chunk[: SNIFF_BYTES - len(self.head)]
+        self.digest.update(chunk)
+        self.file.write(chunk)
+        self.size += len(chunk)
+
+    def commit(self) -> StoredImage:
+        self.file.close()
+        if not self.size:
+            self.abort()
+            raise ValueError("Empty image response.")
+        content_type = sniff_content_type(self.head)
+        digest = self.digest.hexdigest()
+        filename = f"{digest}.{EXTENSIONS.get(content_type, 'png')}"
+        path = self.store.root / filename
+        if path.exists():
+            self.path.unlink()
+        else:
+            os.replace(self.path, path)
+        return self.store._stored(digest, filename, path, content_type, self.size)
+
+    def abort(self):
+        self.file.close()
+        self.path.unlink(missing_ok=True)
+
+
+class LocalImageStore(ImageStore):
+    def __init__(self, root: Path | None = None):
+        self.root = root or rx.get_upload_dir() / IMAGE_STORE_SUBDIR
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _write(self, filename: str, data: bytes):
+        path = self.root / filename
+        if path.exists():
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+    def _stored(
+        self,
+        digest: str,
+        filename: str,
+        source: bytes | Path,
+        content_type: str,
+        size: int,
+    ) -> StoredImage:
+        thumbnail_filename = f"{digest}_thumb.webp"
+        if not (self.root / thumbnail_filename).exists():
+            thumbnail = make_thumbnail(source)
+            if thumbnail is None:
+                thumbnail_filename = filename
+            else:
+                self._write(thumbnail_filename, thumbnail)
+        return StoredImage(
+            url=f"{IMAGE_STORE_SUBDIR}/{filename}",
+            thumbnail_url=f"{IMAGE_STORE_SUBDIR}/{thumbnail_filename}",
+            content_type=content_type,
+            size=size,
+        )
+
+    def put(self, data: bytes, content_type: str) -> StoredImage:
+        digest = hashlib.sha256(data).hexdigest()
+        filename = f"{digest}.{EXTENSIONS.get(content_type, 'png')}"
+        self._write(filename, data)
+        return self._stored(digest, filename, data, content_type, len(data))
+
+    def open_writer(self) -> ImageWriter:
+        return LocalImageWriter(self)
+
+
+IMAGE_STORES: dict[str, type[ImageStore]] = {"local": LocalImageStore}
+
+_store: ImageStore | None = None
+
+
+def get_store() -> ImageStore:
+    global _store
+    if _store is None:
+        _store = IMAGE_STORES[IMAGE_STORE_BACKEND]()
+    return _store
+
+
+def image_src(url: rx.Var) -> rx.Var:
+    return rx.cond(url.to(str).startswith("http"), url, rx.get_upload_url(url))
\ No newline at end of file
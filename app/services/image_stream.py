@@ -0,0 +1,99 @@
+import base64
+import os
+
+CHUNK_SIZE = int(os.getenv("IMAGE_STREAM_CHUNK_SIZE", str(64 * 1024)))
+
+JSON_WHITESPACE = b" \t\r\n"
+DROPPED_ESCAPES = b"nrt"
+
+_SEEK_KEY = "seek_key"
+_SEEK_VALUE = "seek_value"
+_IN_VALUE = "in_value"
+_DONE = "done"
+
+
+class JsonImageDecoder:
+    def __init__(self, key: str = "image"):
+        self.key = f'"{key}"'.encode()
+        self._state = _SEEK_KEY
+        self._tail = b""
+        self._seen_colon = False
+        self._escape = False
+        self._pending = b""
+
+    @property
+    def done(self) -> bool:
+        return self._state == _DONE
+
+    def _seek_key(self, data: bytes) -> bytes:
+        data = self._tail + data
+        index = data.find(self.key)
+        if index < 0:
+            self._tail = data[-(len(self.key) - 1) :]
+            return b""
+        self._tail = b""
+        self._state = _SEEK_VALUE
+        self._seen_colon = False
+        return data[index + len(self.key) :]
+
+    def _seek_value(self, data: bytes) -> bytes:
+        for index, byte in enumerate(data):
+            if byte in JSON_WHITESPACE:
+                continue
+            if byte == ord(":") and not self._seen_colon:
+                self._seen_colon = True
+                continue
+            if byte == ord('"') and self._seen_colon:
+                self._state = _IN_VALUE
+                return data[index + 1 :]
+            self._state = _SEEK_KEY
+            return data[index:]
+        return b""
+
+    def _read_value(self, data: bytes) -> bytes:
+        parts = []
+        while data:
+            if self._escape:
+                self._escape = False
+                escaped, data = data[:1], data[1:]
+                if escaped == b"/":
+                    parts.append(escaped)
+                elif escaped not in DROPPED_ESCAPES:
+                    raise ValueError(f"Unexpected escape in base64 image: \\{escaped}")
+                continue
+            quote = data.find(b'"')
+            backslash = data.find(b"\\")
+            end = min(i for i in (quote, backslash, len(data)) if i >= 0)
+            parts.append(data[:end])
+            if end == len(data):
+                break
+            if end == backslash:
+                self._escape = True
+                data = data[end + 1 :]
+                continue
+            self._state = _DONE
+            break
+        return self._decode(b"".join(parts))
+
+    def _decode(self, text: bytes) -> bytes:
+        text = self._pending + text.translate(None, JSON_WHITESPACE)
+        aligned = len(text) - len(text) % 4
+        self._pending = text[aligned:]
+        return base64.b64decode(text[:aligned], validate=True)
+
+    def feed(self, chunk: bytes) -> bytes:
+        data = chunk
+        while data and self._state != _DONE:
+            if self._state == _SEEK_KEY:
+                data = self._seek_key(data)
+            elif self._state == _SEEK_VALUE:
+                data = self._seek_value(data)
+            else:
+                return self._read_value(data)
+        return b""
+
+    def close(self):
+        if self._state != _DONE:
+            raise ValueError("No base64 image found in JSON response.")
+        if self._pending:
+            raise ValueError("Truncated base64 image in JSON response.")
\ No newline at end of file
@@ -0,0 +1,55 @@
+import re
+
+FENCE_RE = re.compile(r"^([ \t]*)(`{3,}|~{3,})")
+LIST_ITEM_RE = re.compile(r"^ {0,3}(?:[-+*]|\d{1,9}[.)])(?:[ \t]|$)")
+
+
+class BlockSplitter:
+    def __init__(self):
+        self.blocks: list[str] = []
+        self.tail = ""
+        self._scanned = 0
+        self._fence = ""
+        self._pending: int | None = None
+        self._list = False
+
+    def _close(self, end: int):
+        block = self.tail[:end].strip("\n")
+        if block.strip():
+            self.blocks.append(block)
+        self.tail = self.tail[end:]
+        self._scanned -= end
+        self._pending = None
+        self._list = False
+
+    def _continues(self, line: str) -> bool:
+        return line[0] in " \t" or bool(self._list and LIST_ITEM_RE.match(line))
+
+    def feed(self, text: str):
+        self.tail += text
+        while (newline := self.tail.find("\n", self._scanned)) >= 0:
+            start, line = self._scanned, self.tail[self._scanned : newline]
+            self._scanned = newline + 1
+            stripped = line.strip()
+            if self._fence:
+                if stripped.startswith(self._fence) and not stripped.strip(
+                    self._fence[0]
+                ):
+                    self._fence = ""
+                    self._pending = self._scanned
+                continue
+            if not stripped:
+                self._pending = self._scanned
+                continue
+            if self._pending is not None:
+                if self._continues(line):
+                    self._pending = None
+                else:
+                    start -= self._pending
+                    self._close(self._pending)
+            if match := FENCE_RE.match(line):
+                self._fence = match.group(2)
+                if not match.group(1):
+                    self._close(start)
+            elif LIST_ITEM_RE.match(line):
+                self._list = True
\ No newline at end of file
@@ -0,0 +1,151 @@
+import contextlib
+import math
+import threading
+import time
+
+from starlette.responses import PlainTextResponse
+
+DEFAULT_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+BYTES_BUCKETS = tuple(2**i for i in range(10, 26, 2))
+RATE_BUCKETS = (1, 5, 10, 20, 30, 50, 75, 100, 150, 250, 500)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_lock = threading.Lock()
+
+
+def _label_key(labels: dict[str, str]) -> tuple[tuple[str, str], ...]:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class Counter:
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+        self.values: dict[tuple[tuple[str, str], ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str):
+        key = _label_key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0.0) + amount
+
+    def get(self, **labels: str) -> float:
+        return self.values.get(_label_key(labels), 0.0)
+
+
+class Gauge(Counter):
+    def set(self, value: float, **labels: str):
+        key = _label_key(labels)
+        with _lock:
+            self.values[key] = value
+
+
+class Histogram:
+    def __init__(
+        self, name: str, description: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self.counts: dict[tuple[tuple[str, str], ...], list[int]] = {}
+        self.sums: dict[tuple[tuple[str, str], ...], float] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = _label_key(labels)
+        with _lock:
+            counts = self.counts.setdefault(key, [0] * (len(self.buckets) + 1))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            else:
+                counts[-1] += 1
+            self.sums[key] = self.sums.get(key, 0.0) + value
+
+    def count(self, **labels: str) -> int:
+        return sum(self.counts.get(_label_key(labels), []))
+
+    def sum(self, **labels: str) -> float:
+        return self.sums.get(_label_key(labels), 0.0)
+
+    @contextlib.contextmanager
+    def time(self, **labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+
+REGISTRY: dict[str, Counter | Gauge | Histogram] = {}
+
+
+def counter(name: str, description: str) -> Counter:
+    if name not in REGISTRY:
+        REGISTRY[name] = Counter(name, description)
+    return REGISTRY[name]
+
+
+def gauge(name: str, description: str) -> Gauge:
+    if name not in REGISTRY:
+        REGISTRY[name] = Gauge(name, description)
+    return REGISTRY[name]
+
+
+def histogram(
+    name: str, description: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS
+) -> Histogram:
+    if name not in REGISTRY:
+        REGISTRY[name] = Histogram(name, description, buckets)
+    return REGISTRY[name]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(key: tuple[tuple[str, str], ...], **extra: str) -> str:
+    pairs = [*key, *extra.items()]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def render() -> str:
+    lines = []
+    with _lock:
+        for name, metric in sorted(REGISTRY.items()):
+            if isinstance(metric, Gauge):
+                kind = "gauge"
+            elif isinstance(metric, Counter):
+                kind = "counter"
+            else:
+                kind = "histogram"
+            lines.append(f"# HELP {name} {_escape(metric.description)}")
+            lines.append(f"# TYPE {name} {kind}")
+            if isinstance(metric, Counter):
+                for key, value in metric.values.items():
+                    lines.append(f"{name}{_format_labels(key)} {_format_value(value)}")
+                continue
+            for key, counts in metric.counts.items():
+                cumulative = 0
+                for bound, count in zip((*metric.buckets, math.inf), counts):
+                    cumulative += count
+                    le = _format_labels(key, le=_format_value(bound))
+                    lines.append(f"{name}_bucket{le} {cumulative}")
+                lines.append(
+                    f"{name}_sum{_format_labels(key)} {_format_value(metric.sums[key])}"
+                )
+                lines.append(f"{name}_count{_format_labels(key)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+async def metrics_endpoint() -> PlainTextResponse:
+    return PlainTextResponse(render(), media_type=CONTENT_TYPE)
\ No newline at end of file
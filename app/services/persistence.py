@@ -0,0 +1,240 @@
+import asyncio
+import os
+import threading
+from datetime import datetime, timezone
+from typing import TypedDict
+
+import alembic.config
+import alembic.script
+import reflex as rx
+import sqlalchemy
+import sqlmodel
+from alembic.runtime.migration import MigrationContext
+from reflex.config import environment
+
+from app.models import ChatMessage, Conversation, ImageRecord
+
+CONVERSATION_PAGE_SIZE = int(os.getenv("CONVERSATION_PAGE_SIZE", "20"))
+CONVERSATION_TITLE_CHARS = 60
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+INITIAL_REVISION = "33d501dd7ca2"
+
+MESSAGE_FIELDS = (
+    "role",
+    "content",
+    "image_url",
+    "tool_call_info",
+    "tool_call_status",
+    "model",
+)
+
+
+class ConversationSummary(TypedDict):
+    id: int
+    title: str
+    updated_at: str
+
+
+_init_lock = threading.Lock()
+_initialized = False
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def _stamp_unversioned(engine: sqlalchemy.engine.Engine):
+    with engine.connect() as connection:
+        tables = sqlalchemy.inspect(connection).get_table_names()
+        if "conversation" not in tables or "alembic_version" in tables:
+            return
+        script = alembic.script.ScriptDirectory.from_config(
+            alembic.config.Config(environment.ALEMBIC_CONFIG.get())
+        )
+        MigrationContext.configure(connection).stamp(script, INITIAL_REVISION)
+        connection.commit()
+
+
+def init_db():
+    global _initialized
+    with _init_lock:
+        if _initialized:
+            return
+        engine = rx.model.get_engine()
+        if engine.dialect.name == "sqlite":
+            sqlalchemy.event.listen(engine, "connect", _set_sqlite_pragmas)
+            engine.dispose()
+        _stamp_unversioned(engine)
+        rx.Model.migrate()
+        _initialized = True
+
+
+def _session() -> sqlmodel.Session:
+    init_db()
+    return rx.session()
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def _create_conversation(owner_id: str, title: str, model: str) -> int:
+    with _session() as session:
+        conversation = Conversation(
+            owner_id=owner_id,
+            title=" ".join(title.split())[:CONVERSATION_TITLE_CHARS],
+            model=model,
+        )
+        session.add(conversation)
+        session.commit()
+        return conversation.id
+
+
+def _append_messages(conversation_id: int, messages: list[dict]) -> str:
+    now = _utcnow()
+    with _session() as session:
+        session.add_all(
+            ChatMessage(
+                conversation_id=conversation_id,
+                created_at=now,
+                **{field: message.get(field) for field in MESSAGE_FIELDS},
+            )
+            for message in messages
+        )
+        session.exec(
+            sqlmodel.update(Conversation)
+            .where(Conversation.id == conversation_id)
+            .values(updated_at=now)
+        )
+        session.commit()
+    return now.isoformat()
+
+
+def _list_conversations(
+    owner_id: str, before: tuple[str, int] | None, limit: int
+) -> list[ConversationSummary]:
+    query = sqlmodel.select(
+        Conversation.id, Conversation.title, Conversation.updated_at
+    ).where(Conversation.owner_id == owner_id)
+    if before:
+        updated_at, conversation_id = datetime.fromisoformat(before[0]), before[1]
+        query = query.where(
+            sqlalchemy.or_(
+                Conversation.updated_at < updated_at,
+                sqlalchemy.and_(
+                    Conversation.updated_at == updated_at,
+                    Conversation.id < conversation_id,
+                ),
+            )
+        )
+    query = query.order_by(
+        Conversation.updated_at.desc(), Conversation.id.desc()
+    ).limit(limit)
+    with _session() as session:
+        return [
+            ConversationSummary(
+                id=row.id, title=row.title, updated_at=row.updated_at.isoformat()
+            )
+            for row in session.exec(query)
+        ]
+
+
+def _load_messages(owner_id: str, conversation_id: int) -> list[dict] | None:
+    with _session() as session:
+        conversation = session.get(Conversation, conversation_id)
+        if conversation is None or conversation.owner_id != owner_id:
+            return None
+        rows = session.exec(
+            sqlmodel.select(ChatMessage)
+            .where(ChatMessage.conversation_id == conversation_id)
+            .order_by(ChatMessage.created_at, ChatMessage.id)
+        )
+        return [
+            {
+                field: getattr(row, field)
+                for field in MESSAGE_FIELDS
+                if getattr(row, field) is not None
+            }
+            for row in rows
+        ]
+
+
+def _add_image(owner_id: str, image: dict):
+    with _session() as session:
+        session.add(
+            ImageRecord(
+                owner_id=owner_id,
+                prompt=image["prompt"],
+                image_url=image["image_url"],
+                thumbnail_url=image["thumbnail_url"],
+            )
+        )
+        session.commit()
+
+
+def _count_images(owner_id: str) -> int:
+    with _session() as session:
+        return session.exec(
+            sqlmodel.select(sqlalchemy.func.count(ImageRecord.id)).where(
+                ImageRecord.owner_id == owner_id
+            )
+        ).one()
+
+
+def _list_images(owner_id: str, offset: int, limit: int) -> list[dict]:
+    with _session() as session:
+        rows = session.exec(
+            sqlmodel.select(ImageRecord)
+            .where(ImageRecord.owner_id == owner_id)
+            .order_by(ImageRecord.created_at.desc(), ImageRecord.id.desc())
+            .offset(offset)
+            .limit(limit)
+        )
+        return [
+            {
+                "prompt": row.prompt,
+                "image_url": row.image_url,
+                "thumbnail_url": row.thumbnail_url,
+                "timestamp": str(
+                    int(row.created_at.replace(tzinfo=timezone.utc).timestamp())
+                ),
+            }
+            for row in rows
+        ][::-1]
+
+
+async def create_conversation(owner_id: str, title: str, model: str) -> int:
+    return await asyncio.to_thread(_create_conversation, owner_id, title, model)
+
+
+async def append_messages(conversation_id: int, messages: list[dict]) -> str:
+    return await asyncio.to_thread(_append_messages, conversation_id, messages)
+
+
+async def list_conversations(
+    owner_id: str,
+    before: tuple[str, int] | None = None,
+    limit: int = CONVERSATION_PAGE_SIZE,
+) -> list[ConversationSummary]:
+    return await asyncio.to_thread(_list_conversations, owner_id, before, limit)
+
+
+async def load_messages(owner_id: str, conversation_id: int) -> list[dict] | None:
+    return await asyncio.to_thread(_load_messages, owner_id, conversation_id)
+
+
+async def add_image(owner_id: str, image: dict):
+    await asyncio.to_thread(_add_image, owner_id, image)
+
+
+async def count_images(owner_id: str) -> int:
+    return await asyncio.to_thread(_count_images, owner_id)
+
+
+async def list_images(owner_id: str, offset: int, limit: int) -> list[dict]:
+    return await asyncio.to_thread(_list_images, owner_id, offset, limit)
\ No newline at end of file
@@ -0,0 +1,217 @@
+import asyncio
+import email.utils
+import logging
+import os
+import random
+import time
+from typing import Awaitable, Callable, TypeVar
+
+import httpx
+
+from app.services import metrics
+
+T = TypeVar("T")
+
+RETRY_MAX_ATTEMPTS = int(os.getenv("GATEWAY_RETRY_MAX_ATTEMPTS", "3"))
+RETRY_BASE_DELAY = float(os.getenv("GATEWAY_RETRY_BASE_DELAY", "0.5"))
+RETRY_MAX_DELAY = float(os.getenv("GATEWAY_RETRY_MAX_DELAY", "8"))
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+CONNECT_TIMEOUT = float(os.getenv("GATEWAY_CONNECT_TIMEOUT", "5"))
+FIRST_BYTE_TIMEOUT = float(os.getenv("GATEWAY_FIRST_BYTE_TIMEOUT", "30"))
+IDLE_STREAM_TIMEOUT = float(os.getenv("GATEWAY_IDLE_STREAM_TIMEOUT", "30"))
+IMAGE_TIMEOUT = float(os.getenv("GATEWAY_IMAGE_TIMEOUT", "90"))
+IMAGE_HEDGE_DELAY = float(os.getenv("IMAGE_HEDGE_DELAY", "0"))
+
+BREAKER_FAILURE_THRESHOLD = int(os.getenv("GATEWAY_BREAKER_FAILURE_THRESHOLD", "5"))
+BREAKER_RESET_TIMEOUT = float(os.getenv("GATEWAY_BREAKER_RESET_TIMEOUT", "30"))
+
+RETRIES = metrics.counter(
+    "gateway_retries_total", "Gateway requests retried after a failure."
+)
+BREAKER_TRANSITIONS = metrics.counter(
+    "gateway_breaker_transitions_total", "Circuit breaker state changes."
+)
+BREAKER_REJECTIONS = metrics.counter(
+    "gateway_breaker_rejections_total",
+    "Requests rejected immediately because a model's breaker was open.",
+)
+HEDGES = metrics.counter(
+    "gateway_hedged_requests_total", "Hedged duplicate requests launched."
+)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(httpx.HTTPError):
+    pass
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, httpx.TransportError)
+
+
+def counts_as_failure(error: Exception) -> bool:
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(error, (httpx.TransportError, asyncio.TimeoutError))
+
+
+def _retry_after(error: Exception) -> float | None:
+    if not isinstance(error, httpx.HTTPStatusError):
+        return None
+    value = error.response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(
+            0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time()
+        )
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay(attempt: int, error: Exception) -> float:
+    retry_after = _retry_after(error)
+    if retry_after is not None:
+        return min(retry_after, RETRY_MAX_DELAY)
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2**attempt))
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        reset_timeout: float = BREAKER_RESET_TIMEOUT,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+
+    def _transition(self, state: str):
+        if state != self.state:
+            logging.warning(f"Circuit breaker for {self.name}: {self.state} -> {state}")
+            BREAKER_TRANSITIONS.inc(model=self.name, state=state)
+            self.state = state
+
+    def is_open(self) -> bool:
+        return (
+            self.state == OPEN
+            and time.monotonic() - self.opened_at < self.reset_timeout
+        )
+
+    def allow(self) -> bool:
+        if self.is_open():
+            BREAKER_REJECTIONS.inc(model=self.name)
+            return False
+        if self.state == OPEN:
+            self._transition(HALF_OPEN)
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self._transition(CLOSED)
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._transition(OPEN)
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(model_id: str) -> CircuitBreaker:
+    if model_id not in _breakers:
+        _breakers[model_id] = CircuitBreaker(model_id)
+    return _breakers[model_id]
+
+
+def check_breaker(model_id: str):
+    if not get_breaker(model_id).allow():
+        raise CircuitOpenError(
+            f"Model {model_id} is temporarily unavailable after repeated failures."
+        )
+
+
+async def with_retries(model_id: str, attempt_fn: Callable[[], Awaitable[T]]) -> T:
+    breaker = get_breaker(model_id)
+    attempt = 0
+    while True:
+        try:
+            result = await attempt_fn()
+        except Exception as e:
+            if counts_as_failure(e):
+                breaker.record_failure()
+            if (
+                attempt + 1 >= RETRY_MAX_ATTEMPTS
+                or not is_retryable(e)
+                or not breaker.allow()
+            ):
+                raise
+            delay = retry_delay(attempt, e)
+            logging.warning(
+                f"Gateway call to {model_id} failed ({e!r}), retrying in {delay:.2f}s"
+            )
+            RETRIES.inc(model=model_id)
+            attempt += 1
+            await asyncio.sleep(delay)
+            continue
+        breaker.record_success()
+        return result
+
+
+async def hedged(
+    attempt_fn: Callable[[], Awaitable[T]],
+    delay: float,
+    name: str,
+    discard: Callable[[T], Awaitable[None]] | None = None,
+) -> T:
+    tasks = [asyncio.create_task(attempt_fn())]
+    returned: asyncio.Task | None = None
+    try:
+        done, pending = await asyncio.wait(tasks, timeout=delay)
+        if not done:
+            HEDGES.inc(model=name)
+            tasks.append(asyncio.create_task(attempt_fn()))
+            pending.add(tasks[-1])
+        error: BaseException | None = None
+        while True:
+            for task in tasks:
+                if task in done and not task.cancelled() and task.exception() is None:
+                    returned = task
+                    return task.result()
+            failed = [task for task in done if not task.cancelled()]
+            if failed:
+                error = failed[0].exception()
+            if not pending:
+                raise error or asyncio.CancelledError()
+            done, pending = await asyncio.wait(
+                pending, return_when=asyncio.FIRST_COMPLETED
+            )
+    finally:
+        unfinished = [task for task in tasks if not task.done()]
+        for task in unfinished:
+            task.cancel()
+        await asyncio.gather(*unfinished, return_exceptions=True)
+        if discard is not None:
+            for task in tasks:
+                if (
+                    task is not returned
+                    and not task.cancelled()
+                    and task.exception() is None
+                ):
+                    await discard(task.result())
\ No newline at end of file
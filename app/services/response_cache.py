@@ -0,0 +1,103 @@
+import asyncio
+import hashlib
+import json
+import os
+import re
+from typing import Any, AsyncIterator, Callable, Hashable
+
+from app.services import routing
+from app.services.cache import TTLCache
+from app.services.context import to_api_messages
+from app.services.stream_parser import TEXT_DELTA, StreamEvent
+
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true"
+RESPONSE_CACHE_MAX_BYTES = int(
+    os.getenv("RESPONSE_CACHE_MAX_BYTES", str(16 * 1024 * 1024))
+)
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "3600"))
+REPLAY_CHARS_PER_SECOND = float(
+    os.getenv("RESPONSE_CACHE_REPLAY_CHARS_PER_SECOND", "800")
+)
+REPLAY_CHUNK_CHARS = int(os.getenv("RESPONSE_CACHE_REPLAY_CHUNK_CHARS", "24"))
+
+_CHUNK_RE = re.compile(r"\S+\s*|\s+")
+
+response_cache = TTLCache(
+    "response",
+    max_size=RESPONSE_CACHE_MAX_BYTES,
+    ttl=RESPONSE_CACHE_TTL,
+    sizeof=lambda text: len(text.encode()),
+)
+
+
+def is_first_turn(messages: list[dict]) -> bool:
+    turns = [m for m in to_api_messages(messages) if m["role"] != "system"]
+    return len(turns) == 1 and turns[0]["role"] == "user"
+
+
+def tools_signature(tools: list[dict] | None) -> str:
+    if not tools:
+        return ""
+    return hashlib.sha256(json.dumps(tools, sort_keys=True).encode()).hexdigest()
+
+
+def cache_key(model_id: str, messages: list[dict], tools: list[dict] | None) -> tuple:
+    return (
+        model_id,
+        tuple(
+            (m["role"], " ".join(m["content"].lower().split()))
+            for m in to_api_messages(messages)
+        ),
+        tools_signature(tools),
+    )
+
+
+def servable_models(model_ids: list[str]) -> list[str]:
+    if model_ids and routing.is_healthy(model_ids[0]):
+        return model_ids[:1]
+    return model_ids
+
+
+def lookup(
+    model_ids: list[str],
+    messages: list[dict],
+    tools: list[dict] | None,
+    read: Callable[[Hashable], Any | None] = response_cache.get,
+) -> tuple[str, str] | None:
+    if not RESPONSE_CACHE_ENABLED or not is_first_turn(messages):
+        return None
+    for model_id in servable_models(model_ids):
+        text = read(cache_key(model_id, messages, tools))
+        if text:
+            return model_id, text
+    return None
+
+
+def peek(
+    model_ids: list[str], messages: list[dict], tools: list[dict] | None
+) -> tuple[str, str] | None:
+    return lookup(model_ids, messages, tools, read=response_cache.peek)
+
+
+def put(model_id: str, messages: list[dict], tools: list[dict] | None, text: str):
+    if RESPONSE_CACHE_ENABLED and text.strip() and is_first_turn(messages):
+        response_cache.set(cache_key(model_id, messages, tools), text)
+
+
+def _chunks(text: str) -> list[str]:
+    chunks: list[str] = []
+    for piece in _CHUNK_RE.findall(text):
+        if chunks and len(chunks[-1]) + len(piece) <= REPLAY_CHUNK_CHARS:
+            chunks[-1] += piece
+        else:
+            chunks.append(piece)
+    return chunks
+
+
+async def replay(model_id: str, text: str) -> AsyncIterator[tuple[str, StreamEvent]]:
+    if REPLAY_CHARS_PER_SECOND <= 0:
+        yield model_id, StreamEvent(type=TEXT_DELTA, text=text, tool_call=None)
+        return
+    for chunk in _chunks(text):
+        yield model_id, StreamEvent(type=TEXT_DELTA, text=chunk, tool_call=None)
+        await asyncio.sleep(len(chunk) / REPLAY_CHARS_PER_SECOND)
\ No newline at end of file
@@ -0,0 +1,165 @@
+import json
+import logging
+import os
+import statistics
+import time
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+
+import httpx
+
+from app.services import metrics, resilience
+
+T = TypeVar("T")
+
+AUTO_MODEL = "Auto"
+
+ROUTING_WINDOW_SECONDS = float(os.getenv("ROUTING_WINDOW_SECONDS", "300"))
+ROUTING_MAX_SAMPLES = int(os.getenv("ROUTING_MAX_SAMPLES", "50"))
+ROUTING_MIN_SAMPLES = int(os.getenv("ROUTING_MIN_SAMPLES", "3"))
+ROUTING_MAX_ERROR_RATE = float(os.getenv("ROUTING_MAX_ERROR_RATE", "0.5"))
+
+FALLBACKS = metrics.counter(
+    "model_fallbacks_total",
+    "Requests moved to the next model in a fallback chain after a failure.",
+)
+
+
+class ModelStats:
+    def __init__(self, max_samples: int = ROUTING_MAX_SAMPLES):
+        self.latencies: deque[tuple[float, float]] = deque(maxlen=max_samples)
+        self.outcomes: deque[tuple[float, bool]] = deque(maxlen=max_samples)
+
+    def _prune(self):
+        cutoff = time.monotonic() - ROUTING_WINDOW_SECONDS
+        for samples in (self.latencies, self.outcomes):
+            while samples and samples[0][0] < cutoff:
+                samples.popleft()
+
+    def record_latency(self, seconds: float):
+        self.latencies.append((time.monotonic(), seconds))
+
+    def record_outcome(self, ok: bool):
+        self.outcomes.append((time.monotonic(), ok))
+
+    def latency_p50(self) -> float | None:
+        self._prune()
+        if not self.latencies:
+            return None
+        return statistics.median(seconds for _, seconds in self.latencies)
+
+    def error_rate(self) -> float | None:
+        self._prune()
+        if len(self.outcomes) < ROUTING_MIN_SAMPLES:
+            return None
+        return sum(1 for _, ok in self.outcomes if not ok) / len(self.outcomes)
+
+
+_stats: dict[str, ModelStats] = {}
+
+
+def get_stats(model_id: str) -> ModelStats:
+    if model_id not in _stats:
+        _stats[model_id] = ModelStats()
+    return _stats[model_id]
+
+
+def is_healthy(model_id: str) -> bool:
+    if resilience.get_breaker(model_id).is_open():
+        return False
+    error_rate = get_stats(model_id).error_rate()
+    return error_rate is None or error_rate < ROUTING_MAX_ERROR_RATE
+
+
+def rank(model_ids: list[str]) -> list[str]:
+    healthy = [model_id for model_id in model_ids if is_healthy(model_id)]
+    unhealthy = [model_id for model_id in model_ids if model_id not in healthy]
+    healthy.sort(key=lambda model_id: get_stats(model_id).latency_p50() or 0.0)
+    return healthy + unhealthy
+
+
+def load_fallback_chains(
+    env_var: str, defaults: dict[str, list[str]]
+) -> dict[str, list[str]]:
+    chains = dict(defaults)
+    raw = os.getenv(env_var)
+    if not raw:
+        return chains
+    try:
+        chains.update(json.loads(raw))
+    except json.JSONDecodeError:
+        logging.exception(f"{env_var} is not valid JSON, ignoring it.")
+    return chains
+
+
+def candidates(
+    selected: str, models: dict[str, str], fallbacks: dict[str, list[str]]
+) -> list[str]:
+    if selected == AUTO_MODEL:
+        return rank(list(models.values()))
+    if selected not in models:
+        return []
+    chain = [selected, *fallbacks.get(selected, [])]
+    model_ids = [models[name] for name in chain if name in models]
+    return list(dict.fromkeys(model_ids))
+
+
+def _record_failure(kind: str, model_id: str, error: Exception, has_next: bool):
+    get_stats(model_id).record_outcome(False)
+    if has_next:
+        logging.warning(f"{kind} model {model_id} failed ({error!r}), falling back")
+        FALLBACKS.inc(kind=kind, model=model_id)
+
+
+async def call_with_fallback(
+    kind: str, model_ids: list[str], call_fn: Callable[[str], Awaitable[T]]
+) -> T:
+    last_error: Exception | None = None
+    for i, model_id in enumerate(model_ids):
+        started = time.monotonic()
+        try:
+            result = await call_fn(model_id)
+        except httpx.HTTPError as e:
+            _record_failure(kind, model_id, e, i + 1 < len(model_ids))
+            last_error = e
+            continue
+        stats = get_stats(model_id)
+        stats.record_latency(time.monotonic() - started)
+        stats.record_outcome(True)
+        return result
+    raise last_error or ValueError(f"No {kind} models to route to.")
+
+
+async def stream_with_fallback(
+    kind: str,
+    model_ids: list[str],
+    events_fn: Callable[[str], AsyncIterator[T]],
+) -> AsyncIterator[tuple[str, T]]:
+    last_error: Exception | None = None
+    for i, model_id in enumerate(model_ids):
+        started = time.monotonic()
+        events = events_fn(model_id)
+        try:
+            first = await anext(events)
+        except StopAsyncIteration:
+            get_stats(model_id).record_outcome(True)
+            return
+        except httpx.HTTPError as e:
+            await events.aclose()
+            _record_failure(kind, model_id, e, i + 1 < len(model_ids))
+            last_error = e
+            continue
+        stats = get_stats(model_id)
+        stats.record_latency(time.monotonic() - started)
+        try:
+            yield model_id, first
+            async for event in events:
+                yield model_id, event
+        except httpx.HTTPError:
+            stats.record_outcome(False)
+            raise
+        finally:
+            await events.aclose()
+        stats.record_outcome(True)
+        return
+    raise last_error or ValueError(f"No {kind} models to route to.")
\ No newline at end of file
@@ -0,0 +1,174 @@
+import asyncio
+import contextlib
+import os
+import time
+from collections import OrderedDict, deque
+from typing import Awaitable, Callable
+
+from app.services import metrics
+
+TEXT_CONCURRENCY = int(os.getenv("SCHEDULER_TEXT_CONCURRENCY", "32"))
+TEXT_PER_SESSION = int(os.getenv("SCHEDULER_TEXT_PER_SESSION", "2"))
+IMAGE_CONCURRENCY = int(os.getenv("SCHEDULER_IMAGE_CONCURRENCY", "8"))
+IMAGE_PER_SESSION = int(os.getenv("SCHEDULER_IMAGE_PER_SESSION", "4"))
+MAX_QUEUE = int(os.getenv("SCHEDULER_MAX_QUEUE", "256"))
+
+QUEUE_WAIT = metrics.histogram(
+    "scheduler_wait_seconds",
+    "Time a gateway call waited for a scheduler slot.",
+    buckets=metrics.LATENCY_BUCKETS,
+)
+QUEUE_DEPTH = metrics.gauge(
+    "scheduler_queue_depth", "Gateway calls waiting for a scheduler slot."
+)
+ACTIVE = metrics.gauge("scheduler_active", "Gateway calls holding a scheduler slot.")
+REJECTIONS = metrics.counter(
+    "scheduler_rejections_total",
+    "Gateway calls rejected because the scheduler queue was full.",
+)
+
+PositionCallback = Callable[[int], Awaitable[None]]
+
+
+class SchedulerBusy(Exception):
+    pass
+
+
+class _Ticket:
+    def __init__(self, session: str):
+        self.session = session
+        self.granted = False
+        self.changed = asyncio.Event()
+
+
+class FairScheduler:
+    def __init__(
+        self, name: str, concurrency: int, per_session: int, max_queue: int = MAX_QUEUE
+    ):
+        self.name = name
+        self.concurrency = concurrency
+        self.per_session = per_session
+        self.max_queue = max_queue
+        self.active = 0
+        self.active_by_session: dict[str, int] = {}
+        self.queues: OrderedDict[str, deque[_Ticket]] = OrderedDict()
+        self.queued = 0
+
+    def _can_run(self, session: str) -> bool:
+        return self.active_by_session.get(session, 0) < self.per_session
+
+    def _grant(self, ticket: _Ticket):
+        ticket.granted = True
+        self.active += 1
+        self.active_by_session[ticket.session] = (
+            self.active_by_session.get(ticket.session, 0) + 1
+        )
+
+    def _next_ticket(self) -> _Ticket | None:
+        for session in list(self.queues):
+            if not self._can_run(session):
+                continue
+            queue = self.queues.pop(session)
+            ticket = queue.popleft()
+            if queue:
+                self.queues[session] = queue
+            self.queued -= 1
+            return ticket
+        return None
+
+    def _dispatch(self):
+        while self.active < self.concurrency:
+            ticket = self._next_ticket()
+            if ticket is None:
+                break
+            self._grant(ticket)
+            ticket.changed.set()
+        for queue in self.queues.values():
+            for ticket in queue:
+                ticket.changed.set()
+        QUEUE_DEPTH.set(self.queued, pool=self.name)
+        ACTIVE.set(self.active, pool=self.name)
+
+    def position(self, ticket: _Ticket) -> int:
+        sessions = list(self.queues)
+        if ticket.session not in self.queues:
+            return 0
+        index = self.queues[ticket.session].index(ticket)
+        order = sessions.index(ticket.session)
+        ahead = 0
+        for i, session in enumerate(sessions):
+            length = len(self.queues[session])
+            ahead += min(length, index + 1 if i < order else index)
+        return ahead + 1
+
+    def _remove(self, ticket: _Ticket):
+        queue = self.queues.get(ticket.session)
+        if queue is None or ticket not in queue:
+            return
+        queue.remove(ticket)
+        self.queued -= 1
+        if not queue:
+            del self.queues[ticket.session]
+
+    def release(self, session: str):
+        self.active -= 1
+        self.active_by_session[session] -= 1
+        if not self.active_by_session[session]:
+            del self.active_by_session[session]
+        self._dispatch()
+
+    def has_capacity(self, session: str) -> bool:
+        return (
+            not self.queued
+            and self.active < self.concurrency
+            and self._can_run(session)
+        )
+
+    async def acquire(self, session: str, on_position: PositionCallback | None = None):
+        if self.has_capacity(session):
+            self._grant(_Ticket(session))
+            QUEUE_WAIT.observe(0.0, pool=self.name)
+            ACTIVE.set(self.active, pool=self.name)
+            return
+        if self.queued >= self.max_queue:
+            REJECTIONS.inc(pool=self.name)
+            raise SchedulerBusy(
+                "The service is busy right now. Please try again in a moment."
+            )
+        ticket = _Ticket(session)
+        self.queues.setdefault(session, deque()).append(ticket)
+        self.queued += 1
+        self._dispatch()
+        started = time.perf_counter()
+        reported = 0
+        try:
+            while not ticket.granted:
+                ticket.changed.clear()
+                position = self.position(ticket)
+                if on_position and position != reported:
+                    reported = position
+                    await on_position(position)
+                if not ticket.granted:
+                    await ticket.changed.wait()
+            QUEUE_WAIT.observe(time.perf_counter() - started, pool=self.name)
+            if on_position and reported:
+                await on_position(0)
+        except BaseException:
+            if ticket.granted:
+                self.release(session)
+            else:
+                self._remove(ticket)
+                self._dispatch()
+            raise
+
+    @contextlib.asynccontextmanager
+    async def slot(self, session: str, on_position: PositionCallback | None = None):
+        await self.acquire(session, on_position)
+        try:
+            yield
+        finally:
+            self.release(session)
+
+
+TEXT_POOL = FairScheduler("text", TEXT_CONCURRENCY, TEXT_PER_SESSION)
+IMAGE_POOL = FairScheduler("image", IMAGE_CONCURRENCY, IMAGE_PER_SESSION)
\ No newline at end of file
@@ -0,0 +1,128 @@
+import asyncio
+import contextlib
+import logging
+import os
+from typing import AsyncIterator, Callable, Hashable
+
+from app.services import metrics, scheduler
+from app.services.stream_parser import StreamEvent
+
+SPECULATION_ENABLED = os.getenv("SPECULATION_ENABLED", "false").lower() == "true"
+SPECULATION_TTL = float(os.getenv("SPECULATION_TTL_SECONDS", "15"))
+SPECULATION_DEBOUNCE_MS = int(os.getenv("SPECULATION_DEBOUNCE_MS", "400"))
+SPECULATION_MIN_PROMPT_CHARS = int(os.getenv("SPECULATION_MIN_PROMPT_CHARS", "12"))
+
+EXPIRED = "expired"
+REPLACED = "replaced"
+MISMATCH = "mismatch"
+FAILED = "failed"
+
+SPECULATIONS = metrics.counter(
+    "chat_speculations_total", "Speculative chat streams started or used."
+)
+SPECULATIONS_WASTED = metrics.counter(
+    "chat_speculations_wasted_total",
+    "Speculative chat streams discarded without being used, by reason.",
+)
+
+SourceFn = Callable[[], AsyncIterator[tuple[str, StreamEvent]]]
+
+
+class Speculation:
+    def __init__(self, session: str, key: Hashable, source_fn: SourceFn):
+        self.session = session
+        self.key = key
+        self.events: list[tuple[str, StreamEvent]] = []
+        self.error: Exception | None = None
+        self.done = False
+        self.claimed = False
+        self._changed = asyncio.Event()
+        self._task = asyncio.create_task(self._run(source_fn))
+        self._expiry = asyncio.get_running_loop().call_later(
+            SPECULATION_TTL, self._expire
+        )
+
+    async def _run(self, source_fn: SourceFn):
+        try:
+            async with scheduler.TEXT_POOL.slot(self.session):
+                async with contextlib.aclosing(source_fn()) as events:
+                    async for item in events:
+                        self.events.append(item)
+                        self._changed.set()
+        except Exception as e:
+            logging.warning(f"Speculative stream failed: {e!r}")
+            self.error = e
+        finally:
+            self.done = True
+            self._changed.set()
+
+    def _expire(self):
+        if _speculations.get(self.session) is self:
+            del _speculations[self.session]
+        self.cancel(EXPIRED)
+
+    def cancel(self, reason: str):
+        self._expiry.cancel()
+        if not self._task.done():
+            self._task.cancel()
+        if not self.claimed:
+            SPECULATIONS_WASTED.inc(reason=reason)
+
+    def attach(self):
+        self.claimed = True
+        self._expiry.cancel()
+
+    async def stream(self) -> AsyncIterator[tuple[str, StreamEvent]]:
+        index = 0
+        try:
+            while True:
+                while index < len(self.events):
+                    yield self.events[index]
+                    index += 1
+                if self.done:
+                    break
+                self._changed.clear()
+                if index == len(self.events) and not self.done:
+                    await self._changed.wait()
+            if self.error is not None:
+                raise self.error
+        finally:
+            if not self._task.done():
+                self._task.cancel()
+
+
+_speculations: dict[str, Speculation] = {}
+
+
+def start(session: str, key: Hashable, source_fn: SourceFn) -> bool:
+    current = _speculations.get(session)
+    if current is not None and current.key == key:
+        return False
+    if current is not None:
+        discard(session, REPLACED)
+    if not scheduler.TEXT_POOL.has_capacity(session):
+        return False
+    _speculations[session] = Speculation(session, key, source_fn)
+    SPECULATIONS.inc(outcome="started")
+    return True
+
+
+def discard(session: str, reason: str):
+    current = _speculations.pop(session, None)
+    if current is not None:
+        current.cancel(reason)
+
+
+def claim(session: str, key: Hashable) -> Speculation | None:
+    current = _speculations.pop(session, None)
+    if current is None:
+        return None
+    if current.key != key:
+        current.cancel(MISMATCH)
+        return None
+    if current.error is not None and not current.events:
+        current.cancel(FAILED)
+        return None
+    current.attach()
+    SPECULATIONS.inc(outcome="used")
+    return current
\ No newline at end of file
@@ -0,0 +1,30 @@
+import json
+import os
+import zlib
+
+PACK_MIN_BYTES = int(os.getenv("STATE_PACK_MIN_BYTES", "2048"))
+PACK_LEVEL = int(os.getenv("STATE_PACK_LEVEL", "6"))
+
+
+class Packed(bytes):
+    pass
+
+
+def pack(state: dict, fields: tuple[str, ...]) -> dict:
+    values = state["__dict__"]
+    for field in fields:
+        value = values.get(field)
+        if not value:
+            continue
+        encoded = json.dumps(value, separators=(",", ":")).encode()
+        if len(encoded) >= PACK_MIN_BYTES:
+            values[field] = Packed(zlib.compress(encoded, PACK_LEVEL))
+    return state
+
+
+def unpack(state: dict) -> dict:
+    values = state["__dict__"]
+    for field, value in values.items():
+        if isinstance(value, Packed):
+            values[field] = json.loads(zlib.decompress(value))
+    return state
\ No newline at end of file
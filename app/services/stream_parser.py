@@ -0,0 +1,242 @@
+import ast
+import json
+import logging
+from typing import AsyncIterator, TypedDict
+
+from app.services import metrics
+
+TEXT_DELTA = "text_delta"
+TOOL_CALL_START = "tool_call_start"
+TOOL_CALL_COMPLETE = "tool_call_complete"
+TOOL_CALL_ERROR = "tool_call_error"
+TOOL_USE = "tool_use"
+DONE = "done"
+
+OPEN_TAG = "<tool_call>"
+CLOSE_TAG = "</tool_call>"
+MAX_TOOL_CALL_SIZE = 16 * 1024
+MAX_TOOL_CALL_DEPTH = 16
+
+_LITERAL_NAMES = {"true": True, "false": False, "null": None, "None": None}
+
+TOOL_CALL_PARSE_SECONDS = metrics.histogram(
+    "tool_call_parse_seconds",
+    "Time spent parsing a complete <tool_call> body.",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1),
+)
+
+
+class StreamEvent(TypedDict):
+    type: str
+    text: str
+    tool_call: dict | None
+
+
+class ToolCallParseError(ValueError):
+    pass
+
+
+def _event(type: str, text: str = "", tool_call: dict | None = None) -> StreamEvent:
+    return StreamEvent(type=type, text=text, tool_call=tool_call)
+
+
+def _partial_tag_length(text: str, tag: str) -> int:
+    for length in range(min(len(tag) - 1, len(text)), 0, -1):
+        if tag.startswith(text[-length:]):
+            return length
+    return 0
+
+
+def _literal_from_node(node: ast.AST, depth: int = 0):
+    if depth > MAX_TOOL_CALL_DEPTH:
+        raise ToolCallParseError("Tool call arguments are nested too deeply.")
+    if isinstance(node, ast.Constant) and (
+        node.value is None or isinstance(node.value, (str, int, float, bool))
+    ):
+        return node.value
+    if isinstance(node, ast.Name) and node.id in _LITERAL_NAMES:
+        return _LITERAL_NAMES[node.id]
+    if (
+        isinstance(node, ast.UnaryOp)
+        and isinstance(node.op, ast.USub)
+        and isinstance(node.operand, ast.Constant)
+        and isinstance(node.operand.value, (int, float))
+        and not isinstance(node.operand.value, bool)
+    ):
+        return -node.operand.value
+    if isinstance(node, ast.Dict):
+        if any(key is None for key in node.keys):
+            raise ToolCallParseError("Dict unpacking is not allowed in tool calls.")
+        value = {}
+        for key_node, value_node in zip(node.keys, node.values):
+            key = _literal_from_node(key_node, depth + 1)
+            if isinstance(key, (dict, list)):
+                raise ToolCallParseError("Tool call keys must be constants.")
+            value[key] = _literal_from_node(value_node, depth + 1)
+        return value
+    if isinstance(node, (ast.List, ast.Tuple)):
+        return [_literal_from_node(item, depth + 1) for item in node.elts]
+    raise ToolCallParseError(
+        f"Unsupported expression in tool call: {type(node).__name__}"
+    )
+
+
+def parse_tool_call(text: str, max_size: int = MAX_TOOL_CALL_SIZE) -> dict:
+    text = text.strip()
+    if len(text) > max_size:
+        raise ToolCallParseError(
+            f"Tool call is {len(text)} characters, limit is {max_size}."
+        )
+    try:
+        value = json.loads(text)
+    except RecursionError as e:
+        raise ToolCallParseError("Tool call arguments are nested too deeply.") from e
+    except json.JSONDecodeError:
+        try:
+            tree = ast.parse(text, mode="eval")
+        except (SyntaxError, ValueError, RecursionError, MemoryError) as e:
+            raise ToolCallParseError(f"Invalid tool call syntax: {e}") from e
+        value = _literal_from_node(tree.body)
+    except ValueError as e:
+        raise ToolCallParseError(f"Invalid tool call: {e}") from e
+    if not isinstance(value, dict):
+        raise ToolCallParseError("Tool call must be an object.")
+    return value
+
+
+class StreamParser:
+    def __init__(self, max_tool_call_size: int = MAX_TOOL_CALL_SIZE, model: str = ""):
+        self.max_tool_call_size = max_tool_call_size
+        self.model = model
+        self.in_tool_call = False
+        self.done = False
+        self._held_text = ""
+        self._tool_parts: list[str] = []
+        self._tool_size = 0
+        self._tool_tail = ""
+        self._discarding = False
+
+    def feed_line(self, line: str) -> list[StreamEvent]:
+        if self.done or not line.startswith("data: "):
+            return []
+        payload = line[6:].strip()
+        if not payload:
+            return []
+        if payload == "[DONE]":
+            return self.finish()
+        try:
+            data = json.loads(payload)
+        except json.JSONDecodeError:
+            logging.warning(f"JSON Decode Error for line: {payload}")
+            return []
+        if not isinstance(data, dict):
+            return []
+        if data.get("type") == "tool_use":
+            return [
+                _event(
+                    TOOL_USE,
+                    tool_call={
+                        "name": data.get("name"),
+                        "arguments": data.get("input", {}),
+                    },
+                )
+            ]
+        text_chunk = data.get("response")
+        if not text_chunk or not isinstance(text_chunk, str):
+            return []
+        return self.feed_text(text_chunk)
+
+    def feed_text(self, chunk: str) -> list[StreamEvent]:
+        if self.in_tool_call:
+            return self._feed_tool_text(chunk)
+        text = self._held_text + chunk
+        self._held_text = ""
+        start = text.find(OPEN_TAG)
+        if start == -1:
+            held = _partial_tag_length(text, OPEN_TAG)
+            if held:
+                self._held_text = text[-held:]
+                text = text[:-held]
+            return [_event(TEXT_DELTA, text)] if text else []
+        events = []
+        if start:
+            events.append(_event(TEXT_DELTA, text[:start]))
+        events.append(_event(TOOL_CALL_START))
+        self.in_tool_call = True
+        self._tool_parts = []
+        self._tool_size = 0
+        self._tool_tail = ""
+        self._discarding = False
+        events.extend(self._feed_tool_text(text[start + len(OPEN_TAG) :]))
+        return events
+
+    def _feed_tool_text(self, chunk: str) -> list[StreamEvent]:
+        window = self._tool_tail + chunk
+        end = window.find(CLOSE_TAG)
+        if end == -1:
+            self._tool_tail = window[-(len(CLOSE_TAG) - 1) :]
+            if self._discarding:
+                return []
+            self._tool_parts.append(chunk)
+            self._tool_size += len(chunk)
+            if self._tool_size > self.max_tool_call_size + len(CLOSE_TAG):
+                self._discarding = True
+                self._tool_parts = []
+                return [
+                    _event(
+                        TOOL_CALL_ERROR,
+                        f"Tool call exceeded {self.max_tool_call_size} characters.",
+                    )
+                ]
+            return []
+        rest = window[end + len(CLOSE_TAG) :]
+        if self._discarding:
+            events = []
+        else:
+            cut = end - len(self._tool_tail)
+            if cut >= 0:
+                self._tool_parts.append(chunk[:cut])
+                body = "".join(self._tool_parts)
+            else:
+                body = "".join(self._tool_parts)[:cut]
+            try:
+                with TOOL_CALL_PARSE_SECONDS.time(model=self.model):
+                    tool_call = parse_tool_call(body)
+                events = [_event(TOOL_CALL_COMPLETE, body, tool_call)]
+            except ToolCallParseError as e:
+                logging.warning(
+                    f"Failed to parse tool call string: {body} with error: {e}"
+                )
+                events = [_event(TOOL_CALL_ERROR, str(e))]
+        self.in_tool_call = False
+        self._discarding = False
+        self._tool_parts = []
+        self._tool_tail = ""
+        if rest:
+            events.extend(self.feed_text(rest))
+        return events
+
+    def finish(self) -> list[StreamEvent]:
+        if self.done:
+            return []
+        self.done = True
+        events = []
+        if self._held_text:
+            events.append(_event(TEXT_DELTA, self._held_text))
+            self._held_text = ""
+        if self.in_tool_call:
+            self.in_tool_call = False
+            if not self._discarding:
+                events.append(_event(TOOL_CALL_ERROR, "Tool call was not terminated."))
+        events.append(_event(DONE))
+        return events
+
+
+async def aiter_events(
+    lines: AsyncIterator[str], parser: StreamParser
+) -> AsyncIterator[StreamEvent]:
+    async for line in lines:
+        for event in parser.feed_line(line):
+            yield event
+    for event in parser.finish():
+        yield event
\ No newline at end of file
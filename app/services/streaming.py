@@ -0,0 +1,127 @@
+import os
+import time
+
+from app.services import metrics
+
+FLUSH_INTERVAL_MS = int(os.getenv("CHAT_STREAM_FLUSH_INTERVAL_MS", "60"))
+FLUSH_MAX_CHARS = int(os.getenv("CHAT_STREAM_FLUSH_MAX_CHARS", "256"))
+
+STREAM_FLUSHES = metrics.counter(
+    "chat_stream_flushes_total", "State flushes pushed to the client while streaming."
+)
+STREAM_FLUSHES_PER_RESPONSE = metrics.histogram(
+    "chat_stream_flushes_per_response",
+    "State flushes (websocket frames) sent per streamed response.",
+)
+STREAM_FLUSH_RATE = metrics.histogram(
+    "chat_stream_flush_rate_hz",
+    "Average state flushes per second over a streamed response.",
+    buckets=(1, 2, 5, 10, 15, 20, 30, 50, 100),
+)
+STREAM_CHUNKS_PER_FLUSH = metrics.histogram(
+    "chat_stream_chunks_per_flush",
+    "Upstream text chunks coalesced into one state flush.",
+)
+STREAM_FLUSH_BYTES = metrics.histogram(
+    "chat_stream_flush_bytes",
+    "Size of the streamed message pushed to the client in one state flush.",
+    buckets=metrics.BYTES_BUCKETS,
+)
+CHAT_QUEUE_WAIT = metrics.histogram(
+    "chat_queue_wait_seconds",
+    "Time from message submit until its response stream starts.",
+    buckets=metrics.LATENCY_BUCKETS,
+)
+CHAT_TTFT = metrics.histogram(
+    "chat_ttft_seconds",
+    "Time from stream start to the first text token.",
+    buckets=metrics.LATENCY_BUCKETS,
+)
+CHAT_TOKENS_PER_SECOND = metrics.histogram(
+    "chat_tokens_per_second",
+    "Streamed text chunks per second after the first token.",
+    buckets=metrics.RATE_BUCKETS,
+)
+CHAT_STREAM_DURATION = metrics.histogram(
+    "chat_stream_duration_seconds",
+    "Total duration of a streamed chat response.",
+    buckets=metrics.LATENCY_BUCKETS,
+)
+CHAT_STREAMS = metrics.counter(
+    "chat_streams_total", "Streamed chat responses by outcome."
+)
+
+
+class StreamFlusher:
+    def __init__(
+        self,
+        model: str,
+        interval_ms: int = FLUSH_INTERVAL_MS,
+        max_chars: int = FLUSH_MAX_CHARS,
+    ):
+        self.model = model
+        self.interval = interval_ms / 1000
+        self.max_chars = max_chars
+        self.pending_chars = 0
+        self.pending_chunks = 0
+        self.flush_count = 0
+        self.started_at = time.monotonic()
+        self.last_flush_at = self.started_at
+
+    def add(self, text: str) -> bool:
+        self.pending_chars += len(text)
+        self.pending_chunks += 1
+        return self.should_flush()
+
+    def should_flush(self) -> bool:
+        if not self.pending_chunks:
+            return False
+        if not self.flush_count or self.pending_chars >= self.max_chars:
+            return True
+        return time.monotonic() - self.last_flush_at >= self.interval
+
+    @property
+    def has_pending(self) -> bool:
+        return self.pending_chunks > 0
+
+    def flushed(self, payload_bytes: int = 0):
+        STREAM_FLUSHES.inc(model=self.model)
+        if payload_bytes:
+            STREAM_FLUSH_BYTES.observe(payload_bytes, model=self.model)
+        if self.pending_chunks:
+            STREAM_CHUNKS_PER_FLUSH.observe(self.pending_chunks, model=self.model)
+        self.flush_count += 1
+        self.pending_chars = 0
+        self.pending_chunks = 0
+        self.last_flush_at = time.monotonic()
+
+    def finish(self):
+        elapsed = time.monotonic() - self.started_at
+        STREAM_FLUSHES_PER_RESPONSE.observe(self.flush_count, model=self.model)
+        if elapsed > 0:
+            STREAM_FLUSH_RATE.observe(self.flush_count / elapsed, model=self.model)
+
+
+class StreamStats:
+    def __init__(self, model: str, queued_at: float | None = None):
+        self.model = model
+        self.started_at = time.perf_counter()
+        self.first_token_at: float | None = None
+        self.tokens = 0
+        if queued_at:
+            CHAT_QUEUE_WAIT.observe(max(0.0, time.time() - queued_at), model=model)
+
+    def token(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+            CHAT_TTFT.observe(self.first_token_at - self.started_at, model=self.model)
+        self.tokens += 1
+
+    def finish(self, status: str):
+        ended_at = time.perf_counter()
+        CHAT_STREAM_DURATION.observe(ended_at - self.started_at, model=self.model)
+        CHAT_STREAMS.inc(model=self.model, status=status)
+        if self.first_token_at is not None and ended_at > self.first_token_at:
+            CHAT_TOKENS_PER_SECOND.observe(
+                self.tokens / (ended_at - self.first_token_at), model=self.model
+            )
\ No newline at end of file
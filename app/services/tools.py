@@ -0,0 +1,205 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Awaitable, Callable, TypedDict
+
+from app.services import image_generation, metrics
+from app.services.image_generation import ImageRequest, ImageResult
+
+TOOL_TIMEOUT = float(os.getenv("TOOL_TIMEOUT_SECONDS", "60"))
+TOOL_CONCURRENCY = int(os.getenv("TOOL_CONCURRENCY", "16"))
+IMAGE_TOOL_TIMEOUT = float(os.getenv("IMAGE_TOOL_TIMEOUT_SECONDS", "150"))
+IMAGE_TOOL_CONCURRENCY = int(os.getenv("IMAGE_TOOL_CONCURRENCY", "8"))
+MAX_TOOL_CALLS_PER_TURN = int(os.getenv("MAX_TOOL_CALLS_PER_TURN", "4"))
+MAX_TOOL_ROUNDS = int(os.getenv("MAX_TOOL_ROUNDS", "2"))
+
+SUCCESS = "success"
+ERROR = "error"
+TIMEOUT = "timeout"
+
+TOOL_CALL_DURATION = metrics.histogram(
+    "tool_call_duration_seconds",
+    "Time to execute a tool call requested by the model, by tool and outcome.",
+    buckets=metrics.LATENCY_BUCKETS,
+)
+
+
+class ToolContext(TypedDict):
+    session: str
+    image_request: ImageRequest
+
+
+class ToolResult(TypedDict):
+    name: str
+    status: str
+    content: str
+    image: ImageResult | None
+
+
+ToolHandler = Callable[[dict, ToolContext], Awaitable[ToolResult]]
+
+
+class Tool:
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        parameters: dict,
+        handler: ToolHandler,
+        timeout: float = TOOL_TIMEOUT,
+        concurrency: int = TOOL_CONCURRENCY,
+    ):
+        self.name = name
+        self.schema = {
+            "name": name,
+            "description": description,
+            "parameters": parameters,
+        }
+        self.required = parameters.get("required", [])
+        self.handler = handler
+        self.timeout = timeout
+        self.semaphore = asyncio.Semaphore(concurrency)
+
+
+TOOLS: dict[str, Tool] = {}
+SCHEMAS: list[dict] = []
+
+
+def register(
+    name: str,
+    description: str,
+    parameters: dict,
+    timeout: float = TOOL_TIMEOUT,
+    concurrency: int = TOOL_CONCURRENCY,
+) -> Callable[[ToolHandler], ToolHandler]:
+    def decorator(handler: ToolHandler) -> ToolHandler:
+        tool = Tool(name, description, parameters, handler, timeout, concurrency)
+        TOOLS[name] = tool
+        SCHEMAS.append(tool.schema)
+        return handler
+
+    return decorator
+
+
+def result(
+    name: str, status: str, content: str, image: ImageResult | None = None
+) -> ToolResult:
+    return ToolResult(name=name, status=status, content=content, image=image)
+
+
+def arguments_of(call: dict) -> dict | None:
+    arguments = call.get("arguments", call.get("parameters"))
+    if isinstance(arguments, str):
+        try:
+            arguments = json.loads(arguments)
+        except (ValueError, RecursionError):
+            return None
+    return arguments if isinstance(arguments, dict) else None
+
+
+def _invalid(name: str, tool: Tool | None, arguments: dict | None) -> ToolResult | None:
+    if tool is None:
+        return result(name, ERROR, f"Unknown tool: {name}")
+    if arguments is None:
+        return result(name, ERROR, "Tool call is missing its arguments.")
+    if missing := [key for key in tool.required if not arguments.get(key)]:
+        return result(name, ERROR, f"Missing required arguments: {missing}")
+    return None
+
+
+async def execute(call: dict, context: ToolContext) -> ToolResult:
+    name = str(call.get("name") or "unknown")
+    started = time.perf_counter()
+    try:
+        tool = TOOLS.get(name)
+        arguments = arguments_of(call)
+        outcome = _invalid(name, tool, arguments)
+        if outcome is not None:
+            logging.error(f"Invalid tool call to {name}: {outcome['content']}")
+            TOOL_CALL_DURATION.observe(0.0, tool=name, status=outcome["status"])
+            return outcome
+        async with tool.semaphore:
+            outcome = await asyncio.wait_for(
+                tool.handler(arguments, context), tool.timeout
+            )
+    except asyncio.TimeoutError:
+        outcome = result(name, TIMEOUT, f"{name} timed out after {tool.timeout:g}s.")
+    except Exception as e:
+        logging.exception(f"Tool {name} failed: {e}")
+        outcome = result(name, ERROR, image_generation.error_message(e))
+    TOOL_CALL_DURATION.observe(
+        time.perf_counter() - started, tool=name, status=outcome["status"]
+    )
+    return outcome
+
+
+async def execute_all(calls: list[dict], context: ToolContext) -> list[ToolResult]:
+    skipped = [
+        result(
+            str(call.get("name") or "unknown"),
+            ERROR,
+            f"Only {MAX_TOOL_CALLS_PER_TURN} tool calls are allowed per turn.",
+        )
+        for call in calls[MAX_TOOL_CALLS_PER_TURN:]
+    ]
+    results = await asyncio.gather(
+        *(execute(call, context) for call in calls[:MAX_TOOL_CALLS_PER_TURN])
+    )
+    return [*results, *skipped]
+
+
+def call_markup(calls: list[dict]) -> str:
+    return "".join(f"<tool_call>{json.dumps(call)}</tool_call>" for call in calls)
+
+
+def result_message(outcome: ToolResult) -> dict:
+    return {
+        "role": "tool",
+        "content": json.dumps(
+            {
+                "name": outcome["name"],
+                "status": outcome["status"],
+                "content": outcome["content"],
+            }
+        ),
+    }
+
+
+@register(
+    "generate_image",
+    "Generate an image based on a user prompt.",
+    {
+        "type": "object",
+        "properties": {
+            "prompt": {
+                "type": "string",
+                "description": "The prompt for the image to be generated.",
+            },
+            "style": {
+                "type": "string",
+                "description": "The style of the image, e.g., 'photorealistic', 'anime'.",
+            },
+        },
+        "required": ["prompt"],
+    },
+    timeout=IMAGE_TOOL_TIMEOUT,
+    concurrency=IMAGE_TOOL_CONCURRENCY,
+)
+async def generate_image(arguments: dict, context: ToolContext) -> ToolResult:
+    request = ImageRequest(
+        **{
+            **context["image_request"],
+            "prompt": str(arguments["prompt"]),
+            "style": str(arguments.get("style") or "photorealistic"),
+        }
+    )
+    image = await image_generation.generate(request)
+    return result(
+        "generate_image",
+        SUCCESS,
+        f"Generated an image for the prompt '{image['prompt']}'. "
+        "It is already shown to the user.",
+        image,
+    )
\ No newline at end of file
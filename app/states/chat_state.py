@@ -1,20 +1,61 @@
 import reflex as rx
-from typing import TypedDict, Optional
-import os
-import requests
-import json
+from typing import NotRequired, TypedDict
+import contextlib
+import functools
+import httpx
 import logging
-import ast
+import time
+import uuid
+from app.services import (
+    cancellation,
+    gateway,
+    image_generation,
+    persistence,
+    response_cache,
+    routing,
+    scheduler,
+    speculation,
+    state_codec,
+    tools,
+)
+from app.services.markdown_blocks import BlockSplitter
+from app.services.persistence import ConversationSummary
+from app.services.context import compact_history, context_budget
+from app.services.stream_parser import (
+    StreamParser,
+    aiter_events,
+    TEXT_DELTA,
+    TOOL_CALL_START,
+    TOOL_CALL_COMPLETE,
+    TOOL_CALL_ERROR,
+    TOOL_USE,
+)
+from app.services.streaming import StreamFlusher, StreamStats
+from app.states.user_state import UserState
 
 
 class Message(TypedDict):
     role: str
     content: str
-    is_initial_greeting: Optional[bool]
-    image_b64: Optional[str]
-    tool_call_info: Optional[str]
-    tool_call_status: Optional[str]
-    tool_call_error: Optional[str]
+    is_initial_greeting: NotRequired[bool]
+    image_url: NotRequired[str]
+    tool_call_info: NotRequired[str]
+    tool_call_status: NotRequired[str]
+    tool_call_error: NotRequired[str]
+    model: NotRequired[str]
+
+
+def message(role: str, content: str, **fields) -> Message:
+    return Message(
+        role=role,
+        content=content,
+        **{field: value for field, value in fields.items() if value},
+    )
+
+
+def slim(fields: dict) -> Message:
+    extra = {k: v for k, v in fields.items() if k not in ("role", "content")}
+    return message(fields["role"], fields.get("content") or "", **extra)
 
 
 CLOUDFLARE_MODELS = {
@@ -24,29 +65,219 @@ CLOUDFLARE_MODELS = {
     "Llama 2 7B Chat": "@cf/meta/llama-2-7b-chat-int8",
     "Mistral 7B Instruct": "@cf/mistral/mistral-7b-instruct-v0.1",
 }
+MODEL_NAMES = {model_id: name for name, model_id in CLOUDFLARE_MODELS.items()}
+
+CHAT_MODEL_FALLBACKS = routing.load_fallback_chains(
+    "CHAT_MODEL_FALLBACKS",
+    {
+        "Llama 3.1 8B Instruct Fast": [
+            "Llama 3.1 8B Instruct",
+            "Hermes 2 Pro Mistral 7B",
+        ],
+        "Llama 3.1 8B Instruct": [
+            "Llama 3.1 8B Instruct Fast",
+            "Hermes 2 Pro Mistral 7B",
+        ],
+        "Hermes 2 Pro Mistral 7B": ["Llama 3.1 8B Instruct Fast"],
+        "Llama 2 7B Chat": ["Llama 3.1 8B Instruct Fast"],
+        "Mistral 7B Instruct": ["Hermes 2 Pro Mistral 7B"],
+    },
+)
+
+PACKED_FIELDS = ("messages", "conversations")
+
+
+async def _stream_events(model_id: str, messages: list[dict], tools: list[dict]):
+    data = {
+        "messages": compact_history(messages, model_id, tools),
+        "stream": True,
+        "max_tokens": context_budget(model_id)["max_output_tokens"],
+        "tools": tools,
+    }
+    async with gateway.stream(model_id, data) as response:
+        async for event in aiter_events(
+            response.aiter_lines(), StreamParser(model=model_id)
+        ):
+            yield event
+
+
+def suggestion_prompt(suggestion_text: str) -> str:
+    return f"Help me {suggestion_text.lower()}"
 
 
 class ChatState(rx.State):
     messages: list[Message] = []
+    in_flight: Message | None = None
+    streaming_blocks: list[str] = []
+    streaming_content: str = ""
     is_streaming: bool = False
     selected_model: str = "Hermes 2 Pro Mistral 7B"
     error_message: str = ""
+    conversation_id: int = 0
+    conversations: list[ConversationSummary] = []
+    has_more_conversations: bool = False
+    _persisted_count: int = 0
+    _submitted_at: float = 0.0
+    _stream_id: str = ""
+    _tool_rounds: int = 0
+    queue_position: int = 0
+
+    def __getstate__(self):
+        return state_codec.pack(super().__getstate__(), PACKED_FIELDS)
+
+    def __setstate__(self, state):
+        super().__setstate__(state_codec.unpack(state))
 
     @rx.var
     def model_options(self) -> list[str]:
-        return list(CLOUDFLARE_MODELS.keys())
+        return [routing.AUTO_MODEL, *CLOUDFLARE_MODELS.keys()]
+
+    def _start_new_conversation(self):
+        self.messages = []
+        self.in_flight = None
+        self.conversation_id = 0
+        self._persisted_count = 0
+
+    async def _owner_id(self) -> str:
+        user_state = await self.get_state(UserState)
+        return user_state.ensure_owner_id()
+
+    async def _persist_new_messages(self):
+        async with self:
+            owner_id = await self._owner_id()
+            persisted_count = self._persisted_count
+            pending = [dict(m) for m in self.messages[persisted_count:]]
+            self._persisted_count = len(self.messages)
+            saved_id = conversation_id = self.conversation_id
+            title = self.messages[0]["content"] if self.messages else ""
+            model = self.selected_model
+        if not pending:
+            return
+        try:
+            if not conversation_id:
+                conversation_id = await persistence.create_conversation(
+                    owner_id, title, model
+                )
+            updated_at = await persistence.append_messages(conversation_id, pending)
+        except Exception as e:
+            logging.exception(f"Failed to save conversation: {e}")
+            async with self:
+                if (
+                    self.conversation_id == saved_id
+                    and self._persisted_count == persisted_count + len(pending)
+                ):
+                    self._persisted_count = persisted_count
+                    self.conversation_id = conversation_id
+            return
+        async with self:
+            if not self.conversation_id and self._persisted_count:
+                self.conversation_id = conversation_id
+            titles = {c["id"]: c["title"] for c in self.conversations}
+            summary = ConversationSummary(
+                id=conversation_id,
+                title=titles.get(conversation_id)
+                or " ".join(title.split())[: persistence.CONVERSATION_TITLE_CHARS],
+                updated_at=updated_at,
+            )
+            self.conversations = [summary] + [
+                c for c in self.conversations if c["id"] != conversation_id
+            ]
+
+    @rx.event
+    async def load_conversations(self):
+        owner_id = await self._owner_id()
+        page = await persistence.list_conversations(owner_id)
+        self.conversations = page
+        self.has_more_conversations = len(page) == persistence.CONVERSATION_PAGE_SIZE
+
+    @rx.event
+    async def load_more_conversations(self):
+        if not self.conversations:
+            return
+        owner_id = await self._owner_id()
+        last = self.conversations[-1]
+        page = await persistence.list_conversations(
+            owner_id, (last["updated_at"], last["id"])
+        )
+        known = {c["id"] for c in self.conversations}
+        self.conversations = self.conversations + [
+            c for c in page if c["id"] not in known
+        ]
+        self.has_more_conversations = len(page) == persistence.CONVERSATION_PAGE_SIZE
+
+    @rx.event
+    async def open_conversation(self, conversation_id: int):
+        if self.is_streaming or conversation_id == self.conversation_id:
+            return
+        owner_id = await self._owner_id()
+        messages = await persistence.load_messages(owner_id, conversation_id)
+        if messages is None:
+            yield rx.toast("Conversation not found.", duration=3000)
+            return
+        self.messages = [slim(m) for m in messages]
+        self.conversation_id = conversation_id
+        self._persisted_count = len(messages)
+        self.error_message = ""
+
+    @rx.event
+    def new_conversation(self):
+        if not self.is_streaming:
+            self._start_new_conversation()
+            self.error_message = ""
+
+    def _start_stream(self):
+        self.is_streaming = True
+        self.error_message = ""
+        self._submitted_at = time.time()
+        self._stream_id = uuid.uuid4().hex
+
+    def _begin_reply(self):
+        self.in_flight = message("assistant", "")
+        self._start_stream()
+
+    def _check_owner(self, stream_id: str):
+        if self._stream_id != stream_id:
+            raise cancellation.StreamCancelled(cancellation.CLEARED)
+
+    def _publish_stream(self, blocks: BlockSplitter, content: str) -> str:
+        payload = blocks.tail
+        if len(blocks.blocks) != len(self.streaming_blocks):
+            self.streaming_blocks = list(blocks.blocks)
+            payload = content
+        self.streaming_content = blocks.tail
+        return payload
+
+    def _finish_reply(self):
+        if self.in_flight is not None:
+            self.messages.append(slim(self.in_flight))
+            self.in_flight = None
+
+    def _cancel_stream(self, reason: str):
+        if self._stream_id and self.is_streaming:
+            cancellation.cancel(self._stream_id, reason)
+
+    async def _show_queue_position(self, position: int):
+        async with self:
+            self.queue_position = position
+
+    @rx.event
+    def stop_streaming(self):
+        self._cancel_stream(cancellation.USER)
 
     @rx.event
     def go_back_and_clear_chat(self):
-        self.messages = []
+        self._cancel_stream(cancellation.CLEARED)
+        self._stream_id = ""
+        self._start_new_conversation()
+        self.streaming_blocks = []
+        self.streaming_content = ""
         self.is_streaming = False
         self.error_message = ""
         return rx.redirect("/")
 
     @rx.event
     def submit_suggestion_as_prompt(self, suggestion_text: str):
-        prompt = f"Help me {suggestion_text.lower()}"
-        form_data = {"prompt_input": prompt}
+        form_data = {"prompt_input": suggestion_prompt(suggestion_text)}
         yield ChatState.send_initial_message_and_navigate(form_data)
 
     @rx.event
@@ -56,13 +287,10 @@ class ChatState(rx.State):
             if not prompt:
                 yield rx.toast("Please enter a message.", duration=3000)
             return
-        self.messages = []
-        self.messages.append({"role": "user", "content": prompt})
-        self.messages.append(
-            {"role": "assistant", "content": "", "is_initial_greeting": False}
-        )
-        self.is_streaming = True
-        self.error_message = ""
+        self._start_new_conversation()
+        self.messages.append(message("user", prompt))
+        self._tool_rounds = 0
+        self._begin_reply()
         yield ChatState.stream_cloudflare_response
         yield rx.redirect("/chat")
 
@@ -73,224 +301,291 @@ class ChatState(rx.State):
             if not prompt:
                 yield rx.toast("Please enter a message.", duration=3000)
             return
-        self.messages.append({"role": "user", "content": prompt})
-        self.messages.append(
-            {"role": "assistant", "content": "", "is_initial_greeting": False}
-        )
-        self.is_streaming = True
-        self.error_message = ""
+        self.messages.append(message("user", prompt))
+        self._tool_rounds = 0
+        self._begin_reply()
         yield ChatState.stream_cloudflare_response
 
+    def _speculate(self, prompt: str):
+        if (
+            not speculation.SPECULATION_ENABLED
+            or self.is_streaming
+            or not gateway.is_configured()
+        ):
+            return
+        model_ids = routing.candidates(
+            self.selected_model, CLOUDFLARE_MODELS, CHAT_MODEL_FALLBACKS
+        )
+        history = [message("user", prompt)]
+        if not model_ids or response_cache.peek(model_ids, history, tools.SCHEMAS):
+            return
+        events_fn = functools.partial(
+            _stream_events, messages=history, tools=tools.SCHEMAS
+        )
+        speculation.start(
+            self.router.session.client_token,
+            response_cache.cache_key(self.selected_model, history, tools.SCHEMAS),
+            functools.partial(
+                routing.stream_with_fallback, "chat", model_ids, events_fn
+            ),
+        )
+
+    @rx.event
+    def speculate_suggestion(self, suggestion_text: str):
+        self._speculate(suggestion_prompt(suggestion_text))
+
+    @rx.event
+    def speculate_prompt(self, prompt: str):
+        prompt = prompt.strip()
+        if len(prompt) >= speculation.SPECULATION_MIN_PROMPT_CHARS:
+            self._speculate(prompt)
+
     @rx.event(background=True)
     async def stream_cloudflare_response(self):
-        account_id = os.getenv("CLOUDFLARE_ACCOUNT_ID")
-        gateway_id = os.getenv("CLOUDFLARE_AI_GATEWAY")
-        token = os.getenv("CLOUDFLARE_AI_GATEWAY_TOKEN")
-        if not all([account_id, gateway_id, token]):
+        stream_id = self._stream_id
+        if not gateway.is_configured():
             async with self:
-                self.messages[-1]["content"] = "Cloudflare credentials are not set."
-                self.is_streaming = False
-                self.error_message = "API credentials not configured."
+                if self._stream_id == stream_id:
+                    self.in_flight["content"] = "Cloudflare credentials are not set."
+                    self._finish_reply()
+                    self.is_streaming = False
+                    self.error_message = "API credentials not configured."
             return
-        model_id = CLOUDFLARE_MODELS.get(self.selected_model)
-        if not model_id:
+        model_ids = routing.candidates(
+            self.selected_model, CLOUDFLARE_MODELS, CHAT_MODEL_FALLBACKS
+        )
+        if not model_ids:
             async with self:
-                self.messages[-1]["content"] = "Invalid model selected."
-                self.is_streaming = False
-                self.error_message = "Invalid model."
+                if self._stream_id == stream_id:
+                    self.in_flight["content"] = "Invalid model selected."
+                    self._finish_reply()
+                    self.is_streaming = False
+                    self.error_message = "Invalid model."
             return
-        prompt = self.messages[-2]["content"]
-        url = f"https://gateway.ai.cloudflare.com/v1/{account_id}/{gateway_id}/workers-ai/{model_id}"
-        headers = {
-            "Authorization": f"Bearer {token}",
-            "Content-Type": "application/json",
-        }
-        tools = [
-            {
-                "name": "generate_image",
-                "description": "Generate an image based on a user prompt.",
-                "parameters": {
-                    "type": "object",
-                    "properties": {
-                        "prompt": {
-                            "type": "string",
-                            "description": "The prompt for the image to be generated.",
-                        },
-                        "style": {
-                            "type": "string",
-                            "description": "The style of the image, e.g., 'photorealistic', 'anime'.",
-                        },
-                    },
-                    "required": ["prompt"],
-                },
-            }
-        ]
-        api_messages = [
-            {"role": msg["role"], "content": msg["content"]}
-            for msg in self.messages[:-1]
-        ]
-        data = {"messages": api_messages, "stream": True, "tools": tools}
+        tool_schemas = (
+            tools.SCHEMAS if self._tool_rounds < tools.MAX_TOOL_ROUNDS else []
+        )
+        history = list(self.messages)
+        events_fn = functools.partial(
+            _stream_events, messages=history, tools=tool_schemas
+        )
+        session_key = self.router.session.client_token
+        cached = response_cache.lookup(model_ids, history, tool_schemas)
+        speculative = None
+        if cached is None:
+            speculative = speculation.claim(
+                session_key,
+                response_cache.cache_key(self.selected_model, history, tool_schemas),
+            )
         accumulated_content = ""
-        tool_call_dict = None
-        in_tool_call = False
-        tool_call_str = ""
-        tool_call_completed = False
+        blocks = BlockSplitter()
+        tool_calls: list[dict] = []
+        tool_call_failed = False
+        routed_model = None
+        flusher = StreamFlusher(model=model_ids[0])
+        stats = None
+        status = "ok"
+        token = cancellation.register(stream_id, session_key)
+        owns_stream = True
+        acquired = False
         try:
-            with requests.post(
-                url, headers=headers, json=data, stream=True, timeout=120
-            ) as response:
-                response.raise_for_status()
-                for line in response.iter_lines():
-                    if tool_call_completed:
-                        break
-                    if line:
-                        line_str = line.decode("utf-8")
-                        if line_str.startswith("data: "):
-                            json_str = line_str[6:].strip()
-                            if not json_str or json_str == "[DONE]":
-                                continue
-                            try:
-                                json_data = json.loads(json_str)
-                                if not isinstance(json_data, dict):
-                                    continue
-                                if json_data.get("type") == "tool_use":
-                                    tool_call_completed = True
-                                    tool_call_dict = {
-                                        "name": json_data.get("name"),
-                                        "arguments": json_data.get("input", {}),
-                                    }
-                                    break
-                                if "response" in json_data:
-                                    text_chunk = json_data.get("response", "")
-                                    if not text_chunk:
-                                        continue
-                                    accumulated_content += text_chunk
-                                    if "<tool_call>" in accumulated_content and (
-                                        not in_tool_call
-                                    ):
-                                        in_tool_call = True
-                                        start_index = accumulated_content.find(
-                                            "<tool_call>"
-                                        )
-                                        text_before_tool_call = accumulated_content[
-                                            :start_index
-                                        ].strip()
-                                        accumulated_content = accumulated_content[
-                                            start_index:
-                                        ]
-                                        async with self:
-                                            self.messages[-1]["content"] = (
-                                                text_before_tool_call
-                                            )
-                                            self.messages[-1]["tool_call_status"] = (
-                                                "loading"
-                                            )
-                                    if (
-                                        in_tool_call
-                                        and "</tool_call>" in accumulated_content
-                                    ):
-                                        start_index = accumulated_content.find(
-                                            "<tool_call>"
-                                        ) + len("<tool_call>")
-                                        end_index = accumulated_content.find(
-                                            "</tool_call>"
-                                        )
-                                        tool_call_str = accumulated_content[
-                                            start_index:end_index
-                                        ].strip()
-                                        try:
-                                            tool_call_dict = ast.literal_eval(
-                                                tool_call_str
-                                            )
-                                            tool_call_completed = True
-                                        except (ValueError, SyntaxError) as e:
-                                            logging.exception(
-                                                f"Failed to parse tool call string: {tool_call_str} with error: {e}"
-                                            )
-                                            async with self:
-                                                self.messages[-1]["content"] = (
-                                                    "Sorry, there was an error processing the tool call."
-                                                )
-                                                self.messages[-1][
-                                                    "tool_call_status"
-                                                ] = "error"
-                                        break
-                                    if not in_tool_call:
-                                        async with self:
-                                            if not self.is_streaming:
-                                                break
-                                            self.messages[-1]["content"] = (
-                                                accumulated_content
-                                            )
-                            except json.JSONDecodeError:
-                                logging.exception(
-                                    f"JSON Decode Error for line: {json_str}"
+            token.check()
+            if cached is not None:
+                source = response_cache.replay(*cached)
+            elif speculative is not None:
+                source = speculative.stream()
+            else:
+                await token.run(
+                    scheduler.TEXT_POOL.acquire(session_key, self._show_queue_position)
+                )
+                acquired = True
+                source = routing.stream_with_fallback("chat", model_ids, events_fn)
+            stats = StreamStats(model_ids[0], queued_at=self._submitted_at)
+            async with contextlib.aclosing(token.guard(source)) as events:
+                async for model_id, event in events:
+                    if routed_model is None:
+                        routed_model = model_id
+                        flusher.model = model_id
+                        stats.model = model_id
+                        async with self:
+                            self._check_owner(stream_id)
+                            self.in_flight["model"] = MODEL_NAMES[model_id]
+                    if event["type"] == TEXT_DELTA:
+                        stats.token()
+                        accumulated_content += event["text"]
+                        blocks.feed(event["text"])
+                        if flusher.add(event["text"]):
+                            async with self:
+                                self._check_owner(stream_id)
+                                payload = self._publish_stream(
+                                    blocks, accumulated_content
                                 )
-                                continue
-        except requests.exceptions.RequestException as e:
+                            flusher.flushed(len(payload.encode()))
+                    elif event["type"] in (TOOL_CALL_START, TOOL_USE):
+                        async with self:
+                            self._check_owner(stream_id)
+                            payload = self._publish_stream(blocks, accumulated_content)
+                            self.in_flight["tool_call_status"] = "loading"
+                        flusher.flushed(len(payload.encode()))
+                    if event["type"] in (TOOL_CALL_COMPLETE, TOOL_USE):
+                        tool_calls.append(event["tool_call"])
+                    elif event["type"] == TOOL_CALL_ERROR:
+                        tool_call_failed = True
+                if tool_calls and not tool_schemas:
+                    logging.warning(
+                        f"Ignoring {len(tool_calls)} tool calls after "
+                        f"{tools.MAX_TOOL_ROUNDS} tool rounds"
+                    )
+                    tool_calls = []
+                    tool_call_failed = not accumulated_content.strip()
+                async with self:
+                    self._check_owner(stream_id)
+                    self.streaming_blocks = []
+                    self.streaming_content = ""
+                    if tool_calls:
+                        self.in_flight["content"] = accumulated_content.strip()
+                        self.in_flight["tool_call_info"] = tools.call_markup(tool_calls)
+                    elif tool_call_failed:
+                        self.in_flight["content"] = (
+                            "Sorry, there was an error processing the tool call."
+                        )
+                        self.in_flight["tool_call_status"] = "error"
+                    else:
+                        self.in_flight["content"] = accumulated_content
+                        self.in_flight.pop("tool_call_status", None)
+                flusher.flushed(len(accumulated_content.encode()))
+            if cached is None and routed_model and not (tool_calls or tool_call_failed):
+                response_cache.put(
+                    routed_model, history, tool_schemas, accumulated_content
+                )
+        except scheduler.SchedulerBusy as e:
+            status = "rejected"
+            async with self:
+                if self._stream_id == stream_id:
+                    self.in_flight["content"] = str(e)
+                    self.error_message = str(e)
+        except cancellation.StreamCancelled:
+            status = "cancelled"
+            async with self:
+                if self._stream_id == stream_id:
+                    self.in_flight["content"] = accumulated_content or "Stopped."
+                    self.in_flight.pop("tool_call_status", None)
+        except httpx.HTTPError as e:
+            status = "error"
             logging.exception(f"Error: {e}")
             error_detail = f"API Error: {str(e)}"
             async with self:
-                self.messages[-1]["content"] = (
-                    f"Sorry, I encountered an error. {error_detail}"
-                )
-                self.error_message = error_detail
+                if self._stream_id == stream_id:
+                    self.in_flight["content"] = (
+                        f"Sorry, I encountered an error. {error_detail}"
+                    )
+                    self.error_message = error_detail
         except Exception as e:
+            status = "error"
             logging.exception(f"An unexpected error occurred: {e}")
             async with self:
-                self.messages[-1]["content"] = f"An unexpected error occurred: {str(e)}"
-                self.error_message = str(e)
+                if self._stream_id == stream_id:
+                    self.in_flight["content"] = (
+                        f"An unexpected error occurred: {str(e)}"
+                    )
+                    self.error_message = str(e)
         finally:
+            if acquired:
+                scheduler.TEXT_POOL.release(session_key)
+            flusher.finish()
+            if stats:
+                stats.finish(status)
+            cancellation.release(token, flusher.model)
             async with self:
-                self.is_streaming = False
-        if tool_call_dict:
-            yield ChatState.execute_tool_call(tool_call_dict)
+                owns_stream = self._stream_id == stream_id
+                if owns_stream:
+                    self.streaming_blocks = []
+                    self.streaming_content = ""
+                    self.is_streaming = bool(tool_calls) and status == "ok"
+                    self.queue_position = 0
+                    if not self.is_streaming:
+                        self._finish_reply()
+        if not owns_stream:
+            return
+        if tool_calls and status == "ok":
+            yield ChatState.execute_tool_calls(tool_calls, stream_id)
+        else:
+            await self._persist_new_messages()
 
     @rx.event(background=True)
-    async def execute_tool_call(self, tool_call: dict):
+    async def execute_tool_calls(self, tool_calls: list[dict], stream_id: str):
         from app.states.image_state import ImageGenerationState
-        import time
-
-        logging.info(f"Executing tool call: {tool_call}")
-        tool_name = tool_call.get("name")
-        arguments = tool_call.get("arguments", tool_call.get("parameters"))
-        if arguments is None:
-            logging.error(
-                f"Invalid tool call received: missing 'arguments' or 'parameters'. Full call: {tool_call}"
-            )
+
+        logging.info(f"Executing tool calls: {tool_calls}")
+        session_key = self.router.session.client_token
+        token = cancellation.register(stream_id, session_key)
+        model = ""
+        try:
             async with self:
-                self.messages[-1]["content"] = (
-                    "Sorry, I received an invalid request to generate an image (missing arguments)."
+                self._check_owner(stream_id)
+                model = self.in_flight.get("model") or ""
+                token.check()
+                image_state = await self.get_state(ImageGenerationState)
+                context = tools.ToolContext(
+                    session=session_key,
+                    image_request=image_state._image_request("", "", session_key),
                 )
-                self.messages[-1]["tool_call_status"] = "error"
-            return
-        prompt = arguments.get("prompt")
-        style = arguments.get("style", "photorealistic")
-        if tool_name == "generate_image" and prompt:
+                self.in_flight["tool_call_status"] = "loading"
+                self.in_flight.pop("image_url", None)
+            results = await token.run(tools.execute_all(tool_calls, context))
+            images = [result["image"] for result in results if result["image"]]
+            errors = [
+                result["content"]
+                for result in results
+                if result["status"] != tools.SUCCESS
+            ]
             async with self:
-                self.messages[-1]["content"] = ""
-                self.messages[-1]["tool_call_status"] = "loading"
-                self.messages[-1]["image_b64"] = None
+                self._check_owner(stream_id)
+                token.check()
+                reply = self.in_flight
+                reply["tool_call_status"] = (
+                    "error" if len(errors) == len(results) else "success"
+                )
+                if images:
+                    reply["image_url"] = images[0]["image_url"]
+                if errors and not images and not reply["content"]:
+                    reply["content"] = (
+                        f"Sorry, I couldn't complete that. Reason: {'; '.join(errors)}"
+                    )
+                self._finish_reply()
+                self.messages.extend(tools.result_message(result) for result in results)
                 image_state = await self.get_state(ImageGenerationState)
-            image_b64, error = await image_state._generate_image_from_prompt(
-                prompt, style
-            )
+                for image in images:
+                    image_state._add_to_history(image)
+                owner_id = await self._owner_id()
+                self._tool_rounds += 1
+                self._begin_reply()
+        except cancellation.StreamCancelled:
             async with self:
-                if image_b64:
-                    self.messages[-1]["image_b64"] = image_b64
-                    self.messages[-1]["content"] = "Here is the generated image:"
-                    self.messages[-1]["tool_call_status"] = "success"
-                else:
-                    self.messages[-1]["content"] = (
-                        f"Sorry, I couldn't generate the image. Reason: {error}"
-                    )
-                    self.messages[-1]["tool_call_status"] = "error"
-        else:
-            logging.error(
-                f"Invalid tool call received or prompt missing. Full call: {tool_call}"
-            )
+                if self._stream_id != stream_id:
+                    return
+                self.in_flight.pop("tool_call_status", None)
+                self._finish_reply()
+                self.is_streaming = False
+            await self._persist_new_messages()
+            return
+        except Exception as e:
+            logging.exception(f"Tool calls failed: {e}")
             async with self:
-                self.messages[-1]["content"] = (
-                    "Sorry, I received an invalid request to generate an image."
+                if self._stream_id != stream_id:
+                    return
+                self.in_flight["tool_call_status"] = "error"
+                self.in_flight["content"] = (
+                    self.in_flight["content"]
+                    or f"Sorry, I couldn't complete that. Reason: {e}"
                 )
-                self.messages[-1]["tool_call_status"] = "error"
\ No newline at end of file
+                self._finish_reply()
+                self.is_streaming = False
+                self.error_message = str(e)
+            await self._persist_new_messages()
+            return
+        finally:
+            cancellation.release(token, model)
+        for image in images:
+            await image_generation.save(owner_id, image)
+        yield ChatState.stream_cloudflare_response
\ No newline at end of file
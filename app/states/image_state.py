@@ -1,37 +1,73 @@
 import reflex as rx
 from typing import TypedDict
-import os
-import requests
-import json
+import asyncio
 import logging
-import base64
+import os
+import random
+import functools
 import time
+import uuid
+from app.services import (
+    image_cache,
+    image_generation,
+    metrics,
+    persistence,
+    routing,
+    state_codec,
+)
+from app.services.image_generation import IMAGE_MODELS, ImageRequest, ImageResult
+from app.states.user_state import UserState
 
 
 class GeneratedImage(TypedDict):
     prompt: str
-    image_b64: str
+    image_url: str
+    thumbnail_url: str
     timestamp: str
 
 
-IMAGE_MODELS = {
-    "Leonardo Phoenix 1.0": "@cf/leonardo/phoenix-1.0",
-    "Lucid Origin": "@cf/leonardo/lucid-origin",
-    "Flux-1 Schnell": "@cf/black-forest-labs/flux-1-schnell",
-    "Dreamshaper 8 LCM": "@cf/lykon/dreamshaper-8-lcm",
-    "Stable Diffusion XL Base 1.0": "@cf/stabilityai/stable-diffusion-xl-base-1.0",
-    "Stable Diffusion XL Lightning": "@cf/bytedance/stable-diffusion-xl-lightning",
-}
+class BatchVariant(TypedDict):
+    label: str
+    status: str
+    image_url: str
+    error: str
+    queue_position: int
+
+
+IMAGE_HISTORY_WINDOW = int(os.getenv("IMAGE_HISTORY_WINDOW", "12"))
+BATCH_SIZES = [1, 2, 4]
+PACKED_FIELDS = ("image_history", "history_page_images", "batch_results")
+
+IMAGE_BATCH_SECONDS = metrics.histogram(
+    "image_batch_seconds",
+    "Wall time to generate every variant of a batch or comparison.",
+    buckets=metrics.LATENCY_BUCKETS,
+)
 
 
 class ImageGenerationState(rx.State):
     is_generating: bool = False
     selected_model: str = "Leonardo Phoenix 1.0"
     image_history: list[GeneratedImage] = []
+    history_page: int = 0
+    history_page_images: list[GeneratedImage] = []
+    archived_image_count: int = 0
+    selected_image: GeneratedImage | None = None
     error_message: str = ""
     selected_style: str = "photorealistic"
     selected_size: str = "1024x1024"
     quality_steps: int = 20
+    bypass_cache: bool = False
+    batch_size: int = 1
+    compare_models: list[str] = []
+    batch_results: list[BatchVariant] = []
+    _batch_id: str = ""
+
+    def __getstate__(self):
+        return state_codec.pack(super().__getstate__(), PACKED_FIELDS)
+
+    def __setstate__(self, state):
+        super().__setstate__(state_codec.unpack(state))
 
     @rx.var
     def styles(self) -> list[dict[str, str]]:
@@ -54,124 +90,235 @@ class ImageGenerationState(rx.State):
 
     @rx.var
     def model_options(self) -> list[str]:
+        return [routing.AUTO_MODEL, *IMAGE_MODELS.keys()]
+
+    @rx.var
+    def compare_model_options(self) -> list[str]:
         return list(IMAGE_MODELS.keys())
 
+    @rx.var
+    def batch_sizes(self) -> list[int]:
+        return BATCH_SIZES
+
+    @rx.var
+    def cache_enabled(self) -> bool:
+        return image_cache.IMAGE_CACHE_ENABLED
+
+    @rx.var
+    def queue_position(self) -> int:
+        positions = [
+            variant["queue_position"]
+            for variant in self.batch_results
+            if variant["queue_position"] > 0
+        ]
+        return min(positions, default=0)
+
     @rx.var
     def latest_image(self) -> GeneratedImage | None:
+        if self.selected_image:
+            return self.selected_image
         if self.image_history:
             return self.image_history[-1]
         return None
 
+    @rx.var
+    def visible_history(self) -> list[GeneratedImage]:
+        if self.history_page == 0:
+            return self.image_history[::-1]
+        return self.history_page_images[::-1]
+
+    @rx.var
+    def history_page_count(self) -> int:
+        return 1 + -(-self.archived_image_count // IMAGE_HISTORY_WINDOW)
+
+    async def _owner_id(self) -> str:
+        user_state = await self.get_state(UserState)
+        return user_state.ensure_owner_id()
+
+    def _add_to_history(self, result: ImageResult):
+        self.image_history.append(
+            GeneratedImage(
+                prompt=result["prompt"],
+                image_url=result["image_url"],
+                thumbnail_url=result["thumbnail_url"],
+                timestamp=result["timestamp"],
+            )
+        )
+        while len(self.image_history) > IMAGE_HISTORY_WINDOW:
+            self.image_history.pop(0)
+            self.archived_image_count += 1
+        self.selected_image = None
+
+    async def _record_image(self, result: ImageResult):
+        async with self:
+            self._add_to_history(result)
+            owner_id = await self._owner_id()
+        await image_generation.save(owner_id, result)
+
+    async def _load_history_page(self):
+        if self.history_page == 0:
+            self.history_page_images = []
+            return
+        owner_id = await self._owner_id()
+        self.history_page_images = await persistence.list_images(
+            owner_id, self.history_page * IMAGE_HISTORY_WINDOW, IMAGE_HISTORY_WINDOW
+        )
+
+    @rx.event
+    async def load_image_history(self):
+        if self.is_generating:
+            return
+        owner_id = await self._owner_id()
+        total = await persistence.count_images(owner_id)
+        self.image_history = await persistence.list_images(
+            owner_id, 0, IMAGE_HISTORY_WINDOW
+        )
+        self.archived_image_count = max(0, total - len(self.image_history))
+        self.history_page = 0
+        self.history_page_images = []
+        self.selected_image = None
+
+    @rx.event
+    async def show_older_images(self):
+        if self.history_page + 1 < self.history_page_count:
+            self.history_page += 1
+            await self._load_history_page()
+
+    @rx.event
+    async def show_newer_images(self):
+        if self.history_page > 0:
+            self.history_page -= 1
+            await self._load_history_page()
+
+    @rx.event
+    def select_image(self, image: GeneratedImage):
+        self.selected_image = image
+
+    @rx.event
+    def toggle_bypass_cache(self):
+        self.bypass_cache = not self.bypass_cache
+
+    @rx.event
+    def set_batch_size(self, size: int):
+        if size in BATCH_SIZES:
+            self.batch_size = size
+
+    @rx.event
+    def toggle_compare_model(self, model_name: str):
+        if model_name in self.compare_models:
+            self.compare_models.remove(model_name)
+        elif model_name in IMAGE_MODELS:
+            self.compare_models.append(model_name)
+
+    def _image_request(self, prompt: str, style: str, session: str) -> ImageRequest:
+        return ImageRequest(
+            prompt=prompt,
+            style=style,
+            model=self.selected_model,
+            size=self.selected_size,
+            steps=self.quality_steps,
+            seed=None,
+            use_cache=not self.bypass_cache,
+            fallback=True,
+            session=session,
+        )
+
+    def _batch_requests(
+        self, prompt: str, session: str
+    ) -> list[tuple[str, ImageRequest]]:
+        request = self._image_request(prompt, self.selected_style, session)
+        if self.compare_models:
+            return [
+                (model_name, {**request, "model": model_name, "fallback": False})
+                for model_name in self.compare_models
+            ]
+        if self.batch_size == 1:
+            return [("Variant 1", request)]
+        return [
+            (f"Variant {i + 1}", {**request, "seed": random.randint(0, 2**31 - 1)})
+            for i in range(self.batch_size)
+        ]
+
+    def _variant(self, batch_id: str, index: int) -> BatchVariant | None:
+        if self._batch_id != batch_id:
+            return None
+        return self.batch_results[index]
+
+    async def _show_variant_queue_position(
+        self, batch_id: str, index: int, position: int
+    ):
+        async with self:
+            if variant := self._variant(batch_id, index):
+                variant["queue_position"] = position
+                variant["status"] = "queued" if position > 0 else "loading"
+
+    async def _generate_variant(
+        self, batch_id: str, index: int, request: ImageRequest
+    ) -> bool:
+        try:
+            result = await image_generation.generate(
+                request,
+                functools.partial(self._show_variant_queue_position, batch_id, index),
+            )
+            async with self:
+                if variant := self._variant(batch_id, index):
+                    variant["status"] = "success"
+                    variant["image_url"] = result["image_url"]
+            await self._record_image(result)
+            return True
+        except Exception as e:
+            logging.exception(f"Image generation error: {e}")
+            error = image_generation.error_message(e)
+        async with self:
+            if variant := self._variant(batch_id, index):
+                variant["status"] = "error"
+                variant["error"] = error
+                variant["queue_position"] = 0
+                if len(self.batch_results) == 1:
+                    self.error_message = error
+        return False
+
     @rx.event(background=True)
     async def generate_image(self, form_data: dict):
         async with self:
+            if self.is_generating:
+                return
             prompt = form_data.get("prompt", "").strip()
             if not prompt:
                 yield rx.toast("Please enter a prompt.", duration=3000)
                 return
-            full_prompt = f"{prompt}, {self.selected_style} style"
+            variants = self._batch_requests(prompt, self.router.session.client_token)
+            self.batch_results = [
+                BatchVariant(
+                    label=label,
+                    status="loading",
+                    image_url="",
+                    error="",
+                    queue_position=0,
+                )
+                for label, _ in variants
+            ]
+            batch_id = uuid.uuid4().hex
+            self._batch_id = batch_id
             self.is_generating = True
             self.error_message = ""
         yield
-        account_id = os.getenv("CLOUDFLARE_ACCOUNT_ID")
-        gateway_id = os.getenv("CLOUDFLARE_AI_GATEWAY")
-        token = os.getenv("CLOUDFLARE_AI_GATEWAY_TOKEN")
-        if not all([account_id, gateway_id, token]):
-            async with self:
-                self.error_message = "API credentials not configured."
-                self.is_generating = False
-            return
-        width, height = map(int, self.selected_size.split("x"))
-        model_id = IMAGE_MODELS.get(self.selected_model)
-        url = f"https://gateway.ai.cloudflare.com/v1/{account_id}/{gateway_id}/workers-ai/{model_id}"
-        headers = {"Authorization": f"Bearer {token}"}
-        data = {"prompt": full_prompt, "width": width, "height": height}
-        if "leonardo" not in self.selected_model.lower():
-            data["num_steps"] = self.quality_steps
+        started = time.perf_counter()
         try:
-            with requests.post(
-                url, headers=headers, json=data, timeout=120
-            ) as response:
-                response.raise_for_status()
-                content_type = response.headers.get("Content-Type", "")
-                if "image/png" in content_type:
-                    image_b64 = f"data:image/png;base64,{base64.b64encode(response.content).decode('utf-8')}"
-                elif "image/jpeg" in content_type:
-                    image_b64 = f"data:image/jpeg;base64,{base64.b64encode(response.content).decode('utf-8')}"
-                elif "application/json" in content_type:
-                    json_response = response.json()
-                    image_b64 = (
-                        f"data:image/png;base64,{json_response['result']['image']}"
-                    )
-                else:
-                    raise Exception(f"Unexpected content type: {content_type}")
-                new_image = GeneratedImage(
-                    prompt=full_prompt,
-                    image_b64=image_b64,
-                    timestamp=str(int(time.time())),
+            results = await asyncio.gather(
+                *(
+                    self._generate_variant(batch_id, i, request)
+                    for i, (_, request) in enumerate(variants)
                 )
+            )
+            if len(results) > 1 and not any(results):
                 async with self:
-                    self.image_history.append(new_image)
-        except requests.exceptions.RequestException as e:
-            logging.exception(f"Image generation error: {e}")
-            async with self:
-                self.error_message = f"API Error: {str(e)}"
-        except Exception as e:
-            logging.exception(f"An unexpected error occurred: {e}")
-            async with self:
-                self.error_message = str(e)
+                    if self._batch_id == batch_id:
+                        self.error_message = "All image variants failed."
         finally:
+            IMAGE_BATCH_SECONDS.observe(
+                time.perf_counter() - started, variants=str(len(variants))
+            )
             async with self:
-                self.is_generating = False
-
-    async def _generate_image_from_prompt(
-        self, prompt: str, style: str
-    ) -> tuple[str | None, str | None]:
-        full_prompt = f"{prompt}, {style} style"
-        account_id = os.getenv("CLOUDFLARE_ACCOUNT_ID")
-        gateway_id = os.getenv("CLOUDFLARE_AI_GATEWAY")
-        token = os.getenv("CLOUDFLARE_AI_GATEWAY_TOKEN")
-        if not all([account_id, gateway_id, token]):
-            error_msg = "API credentials not configured for image generation."
-            logging.error(error_msg)
-            return (None, error_msg)
-        model_id = IMAGE_MODELS.get("Leonardo Phoenix 1.0", "@cf/leonardo/phoenix-1.0")
-        width, height = map(int, self.selected_size.split("x"))
-        url = f"https://gateway.ai.cloudflare.com/v1/{account_id}/{gateway_id}/workers-ai/{model_id}"
-        headers = {"Authorization": f"Bearer {token}"}
-        data = {"prompt": full_prompt, "width": width, "height": height}
-        if "leonardo" not in model_id.lower():
-            data["num_steps"] = 20
-        try:
-            with requests.post(
-                url, headers=headers, json=data, timeout=120
-            ) as response:
-                response.raise_for_status()
-                content_type = response.headers.get("Content-Type", "")
-                if "image/png" in content_type:
-                    image_b64 = f"data:image/png;base64,{base64.b64encode(response.content).decode('utf-8')}"
-                elif "image/jpeg" in content_type:
-                    image_b64 = f"data:image/jpeg;base64,{base64.b64encode(response.content).decode('utf-8')}"
-                elif "application/json" in content_type:
-                    json_response = response.json()
-                    image_b64 = (
-                        f"data:image/png;base64,{json_response['result']['image']}"
-                    )
-                else:
-                    raise Exception(f"Unexpected content type: {content_type}")
-                new_image = GeneratedImage(
-                    prompt=full_prompt,
-                    image_b64=image_b64,
-                    timestamp=str(int(time.time())),
-                )
-                async with self:
-                    self.image_history.append(new_image)
-                return (image_b64, None)
-        except requests.exceptions.RequestException as e:
-            error_msg = f"API Error: {e}"
-            logging.exception(f"Image generation error from tool call: {e}")
-            return (None, error_msg)
-        except Exception as e:
-            error_msg = f"An unexpected error occurred: {e}"
-            logging.exception(error_msg)
-            return (None, error_msg)
\ No newline at end of file
+                if self._batch_id == batch_id:
+                    self.is_generating = False
\ No newline at end of file
@@ -0,0 +1,11 @@
+import reflex as rx
+import uuid
+
+
+class UserState(rx.State):
+    owner_id: str = rx.LocalStorage("", name="owner_id", sync=True)
+
+    def ensure_owner_id(self) -> str:
+        if not self.owner_id:
+            self.owner_id = uuid.uuid4().hex
+        return self.owner_id
\ No newline at end of file
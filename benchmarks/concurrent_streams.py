@@ -0,0 +1,151 @@
+import argparse
+import asyncio
+import json
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+
+def _make_handler(tokens: int, token_delay: float):
+    class SSEHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            self.rfile.read(length)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Connection", "close")
+            self.end_headers()
+            for i in range(tokens):
+                time.sleep(token_delay)
+                chunk = json.dumps({"response": f"tok{i} "})
+                self.wfile.write(f"data: {chunk}\n\n".encode("utf-8"))
+                self.wfile.flush()
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+
+    return SSEHandler
+
+
+class _StreamServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+def start_server(tokens: int, token_delay: float) -> tuple[ThreadingHTTPServer, str]:
+    server = _StreamServer(("127.0.0.1", 0), _make_handler(tokens, token_delay))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address
+    return (server, f"http://{host}:{port}/stream")
+
+
+async def _blocking_stream(url: str, client: httpx.AsyncClient | None) -> int:
+    request = urllib.request.Request(
+        url,
+        data=json.dumps({"messages": [], "stream": True}).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    count = 0
+    with urllib.request.urlopen(request, timeout=120) as response:
+        for line in response:
+            if line.startswith(b"data: ") and b"[DONE]" not in line:
+                count += 1
+            await asyncio.sleep(0)
+    return count
+
+
+async def _async_stream(url: str, client: httpx.AsyncClient) -> int:
+    count = 0
+    async with client.stream(
+        "POST", url, json={"messages": [], "stream": True}
+    ) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if line.startswith("data: ") and "[DONE]" not in line:
+                count += 1
+    return count
+
+
+async def _loop_lag_probe(stop: asyncio.Event, samples: list[float]):
+    interval = 0.01
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - start - interval)
+
+
+async def run_level(url: str, mode: str, concurrency: int) -> dict:
+    stream_fn = _blocking_stream if mode == "blocking" else _async_stream
+    limits = httpx.Limits(max_connections=concurrency)
+    lag_samples: list[float] = []
+    stop = asyncio.Event()
+    async with httpx.AsyncClient(timeout=120, limits=limits) as client:
+        probe = asyncio.create_task(_loop_lag_probe(stop, lag_samples))
+        start = time.perf_counter()
+        counts = await asyncio.gather(
+            *(stream_fn(url, client) for _ in range(concurrency))
+        )
+        elapsed = time.perf_counter() - start
+        stop.set()
+        await probe
+    lag_samples.sort()
+    p95_lag = lag_samples[int(len(lag_samples) * 0.95)] if lag_samples else 0.0
+    return {
+        "mode": mode,
+        "concurrency": concurrency,
+        "elapsed_s": round(elapsed, 3),
+        "tokens_per_s": round(sum(counts) / elapsed, 1),
+        "p95_loop_lag_ms": round(p95_lag * 1000, 1),
+        "max_loop_lag_ms": round(max(lag_samples, default=0.0) * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure how many concurrent LLM streams one worker sustains."
+    )
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--token-delay", type=float, default=0.02)
+    parser.add_argument(
+        "--levels", type=str, default="1,2,4,8,16,32,64,128", help="Concurrency sweep."
+    )
+    parser.add_argument(
+        "--max-lag-ms",
+        type=float,
+        default=100.0,
+        help="p95 event loop lag above which a level counts as saturated.",
+    )
+    parser.add_argument(
+        "--modes", type=str, default="blocking,async", help="blocking and/or async."
+    )
+    args = parser.parse_args()
+    server, url = start_server(args.tokens, args.token_delay)
+    ideal_s = args.tokens * args.token_delay
+    print(f"Single stream lower bound: {ideal_s:.2f}s")
+    try:
+        for mode in args.modes.split(","):
+            capacity = 0
+            for level in map(int, args.levels.split(",")):
+                result = asyncio.run(run_level(url, mode, level))
+                print(json.dumps(result))
+                healthy = (
+                    result["p95_loop_lag_ms"] <= args.max_lag_ms
+                    and result["elapsed_s"] <= ideal_s * 2
+                )
+                if healthy:
+                    capacity = level
+            print(f"{mode}: sustained {capacity} concurrent streams")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
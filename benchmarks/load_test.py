@@ -0,0 +1,388 @@
+import argparse
+import asyncio
+import contextlib
+import dataclasses
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from pathlib import Path
+
+import psutil
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.environ.setdefault("REFLEX_UPLOADED_FILES_DIR", tempfile.mkdtemp())
+
+import app.app as app_module
+from reflex.app import process
+from reflex.constants import CompileVars
+from reflex.event import Event
+from reflex.state import State, StateManager, StateManagerMemory
+
+from app.services import gateway, metrics
+from app.states.chat_state import ChatState
+from app.states.image_state import ImageGenerationState
+
+CHAT_PROMPT = "Tell me something interesting."
+IMAGE_PROMPT = "a lighthouse at dusk"
+FLOW_TIMEOUT_SECONDS = 120
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+class Results:
+    def __init__(self):
+        self.chat_ttft: list[float] = []
+        self.chat_duration: list[float] = []
+        self.chat_tokens: list[int] = []
+        self.chat_tokens_per_s: list[float] = []
+        self.chat_frames: list[int] = []
+        self.frame_bytes: list[int] = []
+        self.state_lock: list[float] = []
+        self.image_latency: list[float] = []
+        self.errors: dict[str, int] = {}
+
+    def error(self, flow: str, reason: str):
+        key = f"{flow}:{reason}"
+        self.errors[key] = self.errors.get(key, 0) + 1
+
+
+def time_state_locks(manager: StateManager, samples: list[float]):
+    modify_state = manager.modify_state
+
+    @contextlib.asynccontextmanager
+    async def timed_modify_state(token: str):
+        started = time.perf_counter()
+        async with modify_state(token) as state:
+            samples.append(time.perf_counter() - started)
+            yield state
+
+    object.__setattr__(manager, "modify_state", timed_modify_state)
+
+
+class Namespace:
+    def __init__(self):
+        self.token_to_sid: dict[str, str] = {}
+        self.sid_to_token: dict[str, str] = {}
+        self.clients: dict[str, "Client"] = {}
+
+    def connect(self, client: "Client"):
+        self.token_to_sid[client.token] = client.sid
+        self.sid_to_token[client.sid] = client.token
+        self.clients[client.sid] = client
+
+    async def emit_update(self, update, sid: str):
+        if client := self.clients.get(sid):
+            client.receive(update)
+
+    async def emit(self, *args, **kwargs):
+        pass
+
+
+def create_app(results: Results):
+    app = app_module.app
+    manager = (
+        StateManager.create(State)
+        if os.getenv("REDIS_URL")
+        else StateManagerMemory(state=State)
+    )
+    time_state_locks(manager, results.state_lock)
+    app._state_manager = manager
+    app._event_namespace = Namespace()
+    return app
+
+
+class Client:
+    def __init__(self, app, results: Results):
+        self.app = app
+        self.results = results
+        self.token = uuid.uuid4().hex
+        self.sid = f"sid-{self.token}"
+        self.path = "/"
+        self.values: dict[str, dict] = {}
+        self.versions: dict[tuple[str, str], int] = {}
+        self.frames = 0
+        self._changed = asyncio.Event()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        app.event_namespace.connect(self)
+        self._pump = asyncio.create_task(self._process_events())
+
+    def receive(self, update):
+        self.frames += 1
+        self.results.frame_bytes.append(len(update.json()))
+        for substate, fields in update.delta.items():
+            self.values.setdefault(substate, {}).update(fields)
+            for field in fields:
+                key = (substate, field)
+                self.versions[key] = self.versions.get(key, 0) + 1
+        for event in update.events:
+            if event.name.startswith(f"{State.get_full_name()}."):
+                self._queue.put_nowait(event)
+        self._changed.set()
+
+    def field(self, state: type[State], name: str):
+        return self.values.get(state.get_full_name(), {}).get(name)
+
+    def version(self, state: type[State], name: str) -> int:
+        return self.versions.get((state.get_full_name(), name), 0)
+
+    def send(self, name: str, **payload):
+        self._queue.put_nowait(Event(token=self.token, name=name, payload=payload))
+
+    def call(self, state: type[State], handler: str, **payload):
+        self.send(f"{state.get_full_name()}.{handler}", **payload)
+
+    async def _process_events(self):
+        while True:
+            event = dataclasses.replace(
+                await self._queue.get(),
+                token=self.token,
+                router_data={"pathname": self.path, "query": {}, "asPath": self.path},
+            )
+            try:
+                async for update in process(self.app, event, self.sid, {}, "127.0.0.1"):
+                    self.receive(update)
+            except Exception as e:
+                self.results.error("event", type(e).__name__)
+            finally:
+                self._queue.task_done()
+
+    async def until(self, predicate):
+        async with asyncio.timeout(FLOW_TIMEOUT_SECONDS):
+            while not predicate():
+                self._changed.clear()
+                await self._changed.wait()
+
+    async def open(self, path: str):
+        self.path = path
+        self.send(f"{State.get_full_name()}.{CompileVars.HYDRATE}")
+        self.send(CompileVars.ON_LOAD_INTERNAL)
+        await self._queue.join()
+
+    async def close(self):
+        self._pump.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._pump
+
+
+async def chat_flow(client: Client, results: Results):
+    streaming = client.version(ChatState, "is_streaming")
+    frames = client.frames
+    start = time.perf_counter()
+    client.call(
+        ChatState,
+        "send_chat_page_message",
+        form_data={"chat_page_prompt_input": CHAT_PROMPT},
+    )
+
+    def done() -> bool:
+        return client.version(
+            ChatState, "is_streaming"
+        ) >= streaming + 2 and not client.field(ChatState, "is_streaming")
+
+    await client.until(
+        lambda: (
+            done()
+            or client.field(ChatState, "streaming_content")
+            or client.field(ChatState, "streaming_blocks")
+        )
+    )
+    first_token_at = time.perf_counter()
+    await client.until(done)
+    end = time.perf_counter()
+    if error := client.field(ChatState, "error_message"):
+        results.error("chat", error[:60])
+        return
+    reply = (client.field(ChatState, "messages") or [{}])[-1]
+    tokens = len(reply.get("content", "").split())
+    results.chat_ttft.append(first_token_at - start)
+    results.chat_duration.append(end - start)
+    results.chat_tokens.append(tokens)
+    results.chat_frames.append(client.frames - frames)
+    if end > first_token_at:
+        results.chat_tokens_per_s.append(tokens / (end - first_token_at))
+
+
+async def image_flow(client: Client, results: Results):
+    generating = client.version(ImageGenerationState, "is_generating")
+    start = time.perf_counter()
+    client.call(
+        ImageGenerationState, "generate_image", form_data={"prompt": IMAGE_PROMPT}
+    )
+    await client.until(
+        lambda: (
+            client.version(ImageGenerationState, "is_generating") >= generating + 2
+            and not client.field(ImageGenerationState, "is_generating")
+        )
+    )
+    failed = [
+        variant["error"]
+        for variant in client.field(ImageGenerationState, "batch_results") or []
+        if variant["status"] == "error"
+    ]
+    if failed:
+        results.error("image", failed[0][:60])
+        return
+    results.image_latency.append(time.perf_counter() - start)
+
+
+async def session(app, index: int, args: argparse.Namespace, results: Results):
+    rng = random.Random(index)
+    client = Client(app, results)
+    try:
+        await client.open("/chat")
+        client.call(ChatState, "set_selected_model", value=args.chat_model)
+        client.call(ImageGenerationState, "set_selected_model", value=args.image_model)
+        client.call(ImageGenerationState, "toggle_bypass_cache")
+        for _ in range(args.iterations):
+            flow = "image" if rng.random() < args.image_ratio else "chat"
+            try:
+                if flow == "chat":
+                    await chat_flow(client, results)
+                else:
+                    await image_flow(client, results)
+            except TimeoutError:
+                results.error(flow, "timeout")
+            await asyncio.sleep(rng.uniform(0, args.think_time))
+    finally:
+        await client.close()
+
+
+async def drain_background_tasks(app):
+    while tasks := [task for task in app._background_tasks if not task.done()]:
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def sample_process(stop: asyncio.Event, samples: dict, interval: float = 0.5):
+    process = psutil.Process()
+    process.cpu_percent()
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        samples["cpu"].append(process.cpu_percent())
+        samples["rss"].append(process.memory_info().rss)
+
+
+def use_gateway(url: str):
+    gateway.GATEWAY_BASE_URL = url
+    gateway.ACCOUNT_ID = gateway.ACCOUNT_ID or "mock-account"
+    gateway.GATEWAY_ID = gateway.GATEWAY_ID or "mock-gateway"
+    gateway.TOKEN = gateway.TOKEN or "mock-token"
+
+
+def start_mock(port: int, mock_args: str) -> subprocess.Popen:
+    mock = subprocess.Popen(
+        [
+            sys.executable,
+            str(Path(__file__).with_name("mock_gateway.py")),
+            "--port",
+            str(port),
+            *mock_args.split(),
+        ],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    time.sleep(2)
+    return mock
+
+
+async def run(args: argparse.Namespace) -> dict:
+    results = Results()
+    app = create_app(results)
+    samples = {"cpu": [], "rss": []}
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_process(stop, samples))
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(
+            *(session(app, i, args, results) for i in range(args.sessions))
+        )
+        elapsed = time.perf_counter() - start
+        await drain_background_tasks(app)
+    finally:
+        stop.set()
+        await sampler
+        await gateway.aclose()
+    return {
+        "sessions": args.sessions,
+        "state_manager": type(app.state_manager).__name__,
+        "elapsed_s": round(elapsed, 2),
+        "chat_requests": len(results.chat_duration),
+        "chat_ttft_p50_ms": round(percentile(results.chat_ttft, 0.5) * 1000, 1),
+        "chat_ttft_p95_ms": round(percentile(results.chat_ttft, 0.95) * 1000, 1),
+        "chat_tokens_per_s_p50": round(percentile(results.chat_tokens_per_s, 0.5), 1),
+        "chat_duration_p95_ms": round(
+            percentile(results.chat_duration, 0.95) * 1000, 1
+        ),
+        "chat_frames_p50": percentile(results.chat_frames, 0.5),
+        "frame_bytes_p50": percentile(results.frame_bytes, 0.5),
+        "frame_bytes_p95": percentile(results.frame_bytes, 0.95),
+        "state_lock_p95_ms": round(percentile(results.state_lock, 0.95) * 1000, 2),
+        "image_requests": len(results.image_latency),
+        "image_latency_p50_ms": round(percentile(results.image_latency, 0.5) * 1000, 1),
+        "image_latency_p95_ms": round(
+            percentile(results.image_latency, 0.95) * 1000, 1
+        ),
+        "errors": results.errors,
+        "cpu_percent_avg": round(sum(samples["cpu"]) / max(1, len(samples["cpu"])), 1),
+        "cpu_percent_max": max(samples["cpu"], default=0.0),
+        "rss_mb_max": round(max(samples["rss"], default=0) / 2**20, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Drive simulated browser sessions through the ChatState and "
+            "ImageGenerationState event handlers."
+        )
+    )
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--iterations", type=int, default=5)
+    parser.add_argument("--image-ratio", type=float, default=0.2)
+    parser.add_argument("--think-time", type=float, default=0.5)
+    parser.add_argument("--chat-model", default="Hermes 2 Pro Mistral 7B")
+    parser.add_argument("--image-model", default="Flux-1 Schnell")
+    parser.add_argument(
+        "--gateway-url",
+        default=None,
+        help="Gateway base URL. Defaults to a mock gateway spawned on --mock-port.",
+    )
+    parser.add_argument("--mock-port", type=int, default=8787)
+    parser.add_argument(
+        "--mock-args",
+        default="",
+        help="Extra arguments for the spawned mock_gateway.py, e.g. '--token-rate 80'.",
+    )
+    parser.add_argument(
+        "--dump-metrics",
+        action="store_true",
+        help="Print the Prometheus metrics collected during the run.",
+    )
+    args = parser.parse_args()
+    mock = None
+    if args.gateway_url is None:
+        mock = start_mock(args.mock_port, args.mock_args)
+        args.gateway_url = f"http://127.0.0.1:{args.mock_port}/v1"
+    use_gateway(args.gateway_url)
+    try:
+        print(json.dumps(asyncio.run(run(args)), indent=2))
+        if args.dump_metrics:
+            print(metrics.render())
+    finally:
+        if mock is not None:
+            mock.terminate()
+            mock.wait()
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,153 @@
+import argparse
+import asyncio
+import base64
+import io
+import json
+import random
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+_TINY_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mP8z8BQDwAEhQGAhKmMIQAAAABJRU5ErkJggg=="
+)
+WORDS = ["Sure", "here", "is", "a", "short", "answer", "about", "that", "topic", "."]
+
+
+class MockConfig:
+    def __init__(self, args: argparse.Namespace):
+        self.tokens = args.tokens
+        self.token_rate = args.token_rate
+        self.first_token_latency = args.first_token_latency
+        self.tool_call = args.tool_call
+        self.image_format = args.image_format
+        self.image_latency = args.image_latency
+        self.error_rate = args.error_rate
+        self.error_status = args.error_status
+        self.retry_after = args.retry_after
+
+
+def _image_bytes(fmt: str, width: int, height: int, cache: dict) -> bytes:
+    key = (fmt, width, height)
+    if key not in cache:
+        if Image is None:
+            cache[key] = _TINY_PNG
+        else:
+            image = Image.effect_noise((width, height), 64).convert("RGB")
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG" if fmt == "jpeg" else "PNG")
+            cache[key] = buffer.getvalue()
+    return cache[key]
+
+
+def _sse(payload: dict) -> bytes:
+    return f"data: {json.dumps(payload)}\n\n".encode("utf-8")
+
+
+def create_app(config: MockConfig) -> Starlette:
+    image_cache: dict = {}
+
+    async def text_stream(tool_call: str):
+        await asyncio.sleep(config.first_token_latency)
+        delay = 1 / config.token_rate if config.token_rate > 0 else 0
+        for i in range(config.tokens):
+            yield _sse({"response": f"{WORDS[i % len(WORDS)]} "})
+            await asyncio.sleep(delay)
+        if tool_call == "tag":
+            call = "<tool_call>{'name': 'generate_image', 'arguments': {'prompt': 'a lighthouse at dusk', 'style': 'watercolor'}}</tool_call>"
+            for i in range(0, len(call), 6):
+                yield _sse({"response": call[i : i + 6]})
+                await asyncio.sleep(delay)
+        elif tool_call == "tool_use":
+            yield _sse(
+                {
+                    "type": "tool_use",
+                    "name": "generate_image",
+                    "input": {"prompt": "a lighthouse at dusk"},
+                }
+            )
+        yield b"data: [DONE]\n\n"
+
+    async def workers_ai(request: Request) -> Response:
+        payload = await request.json()
+        if random.random() < config.error_rate:
+            headers = {}
+            if config.retry_after is not None:
+                headers["Retry-After"] = str(config.retry_after)
+            return JSONResponse(
+                {"success": False, "errors": [{"message": "injected error"}]},
+                status_code=config.error_status,
+                headers=headers,
+            )
+        if "messages" in payload:
+            tool_call = request.headers.get("x-mock-tool-call", config.tool_call)
+            if not payload.get("stream"):
+                return JSONResponse({"result": {"response": "ok"}, "success": True})
+            return StreamingResponse(
+                text_stream(tool_call), media_type="text/event-stream"
+            )
+        await asyncio.sleep(config.image_latency)
+        fmt = request.headers.get("x-mock-image-format", config.image_format)
+        data = _image_bytes(
+            fmt, payload.get("width", 1024), payload.get("height", 1024), image_cache
+        )
+        if fmt == "json":
+            return JSONResponse(
+                {"result": {"image": base64.b64encode(data).decode()}, "success": True}
+            )
+        return Response(data, media_type=f"image/{fmt}")
+
+    return Starlette(
+        routes=[
+            Route(
+                "/v1/{account}/{gateway}/workers-ai/{model:path}",
+                workers_ai,
+                methods=["POST"],
+            )
+        ]
+    )
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Local stand-in for the Cloudflare AI Gateway Workers AI API."
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--tokens", type=int, default=200)
+    parser.add_argument(
+        "--token-rate", type=float, default=50.0, help="Tokens per second."
+    )
+    parser.add_argument("--first-token-latency", type=float, default=0.3)
+    parser.add_argument(
+        "--tool-call", choices=["none", "tag", "tool_use"], default="none"
+    )
+    parser.add_argument(
+        "--image-format", choices=["png", "jpeg", "json"], default="png"
+    )
+    parser.add_argument("--image-latency", type=float, default=2.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=500)
+    parser.add_argument("--retry-after", type=float, default=None)
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args()
+    print(
+        f"Set CLOUDFLARE_GATEWAY_BASE_URL=http://{args.host}:{args.port}/v1 "
+        "and any non-empty CLOUDFLARE_* credentials to use this server."
+    )
+    uvicorn.run(create_app(MockConfig(args)), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
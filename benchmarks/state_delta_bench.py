@@ -0,0 +1,131 @@
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+import app.app  # noqa: F401
+from reflex.state import State
+from reflex.utils.format import json_dumps
+
+from app.services.markdown_blocks import BlockSplitter
+from app.states.chat_state import ChatState, message
+
+LEGACY_FIELDS = (
+    "is_initial_greeting",
+    "image_url",
+    "tool_call_info",
+    "tool_call_status",
+    "tool_call_error",
+    "model",
+)
+WORDS = "the model streams tokens into a chat bubble while the state syncs".split()
+PARAGRAPH_TOKENS = 40
+
+
+def _text(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def _conversation(messages: int, legacy: bool) -> list[dict]:
+    rng = random.Random(0)
+    history = []
+    for index in range(messages):
+        role = "user" if index % 2 == 0 else "assistant"
+        entry = message(role, _text(rng, rng.randint(20, 120)))
+        if legacy:
+            entry = {**{field: None for field in LEGACY_FIELDS}, **entry}
+            entry["is_initial_greeting"] = False if role == "assistant" else None
+        elif role == "assistant":
+            entry["model"] = "Hermes 2 Pro Mistral 7B"
+        history.append(entry)
+    return history
+
+
+def _delta_size(root: State) -> int:
+    size = len(json_dumps(root.get_delta()))
+    root._clean()
+    return size
+
+
+def measure(legacy: bool, messages: int, tokens: int) -> dict:
+    root = State(_reflex_internal_init=True)
+    chat = root.get_substate(ChatState.get_full_name().split(".")[1:])
+    chat.messages = _conversation(messages, legacy)
+    _delta_size(root)
+    if legacy:
+        chat.messages.append(
+            {
+                **{field: None for field in LEGACY_FIELDS},
+                "role": "assistant",
+                "content": "",
+                "is_initial_greeting": False,
+            }
+        )
+        reply = chat.messages[-1]
+    else:
+        chat._begin_reply()
+        reply = chat.in_flight
+    start_size = _delta_size(root)
+    rng = random.Random(1)
+    blocks = BlockSplitter()
+    content = ""
+    sizes = []
+    for index in range(tokens):
+        if index == 0:
+            reply["model"] = "Hermes 2 Pro Mistral 7B"
+        token = rng.choice(WORDS) + (
+            "\n\n" if index % PARAGRAPH_TOKENS == PARAGRAPH_TOKENS - 1 else " "
+        )
+        content += token
+        if legacy:
+            chat.streaming_content = content
+        else:
+            blocks.feed(token)
+            if len(blocks.blocks) != len(chat.streaming_blocks):
+                chat.streaming_blocks = list(blocks.blocks)
+            chat.streaming_content = blocks.tail
+        sizes.append(_delta_size(root))
+    chat.streaming_blocks = []
+    chat.streaming_content = ""
+    reply["content"] = content
+    chat.is_streaming = False
+    if not legacy:
+        chat._finish_reply()
+    finish_size = _delta_size(root)
+    return {
+        "layout": "legacy" if legacy else "current",
+        "messages": messages,
+        "tokens": tokens,
+        "start_bytes": start_size,
+        "first_token_bytes": sizes[0],
+        "mean_token_bytes": round(sum(sizes) / len(sizes), 1),
+        "last_token_bytes": sizes[-1],
+        "finish_bytes": finish_size,
+        "total_bytes": start_size + sum(sizes) + finish_size,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "State delta bytes sent per token while streaming a reply into a long "
+            "conversation, for the legacy and current message layouts."
+        )
+    )
+    parser.add_argument("--messages", type=int, default=100)
+    parser.add_argument("--tokens", type=int, default=300)
+    args = parser.parse_args()
+    print(
+        json.dumps(
+            [measure(legacy, args.messages, args.tokens) for legacy in (True, False)],
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,124 @@
+import argparse
+import ast
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.services.stream_parser import (
+    CLOSE_TAG,
+    OPEN_TAG,
+    TEXT_DELTA,
+    TOOL_CALL_COMPLETE,
+    TOOL_CALL_ERROR,
+    StreamParser,
+    ToolCallParseError,
+    parse_tool_call,
+)
+
+WORDS = ["the", "quick", "brown", "fox", "jumps", "over", "lazy", "dog", "<b>", "\n"]
+
+
+def synthetic_stream(tokens: int, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    lines = [
+        f"data: {json.dumps({'response': rng.choice(WORDS) + ' '})}"
+        for _ in range(tokens)
+    ]
+    tool_call = "<tool_call>{'name': 'generate_image', 'arguments': {'prompt': 'a fox'}}</tool_call>"
+    for i in range(0, len(tool_call), 4):
+        lines.append(f"data: {json.dumps({'response': tool_call[i : i + 4]})}")
+    lines.append("data: [DONE]")
+    return lines
+
+
+def legacy_parse(lines: list[str]) -> dict | None:
+    accumulated_content = ""
+    in_tool_call = False
+    for line_str in lines:
+        if not line_str.startswith("data: "):
+            continue
+        json_str = line_str[6:].strip()
+        if not json_str or json_str == "[DONE]":
+            continue
+        json_data = json.loads(json_str)
+        text_chunk = json_data.get("response", "")
+        if not text_chunk:
+            continue
+        accumulated_content += text_chunk
+        if "<tool_call>" in accumulated_content and not in_tool_call:
+            in_tool_call = True
+            start_index = accumulated_content.find("<tool_call>")
+            accumulated_content[:start_index].strip()
+            accumulated_content = accumulated_content[start_index:]
+        if in_tool_call and "</tool_call>" in accumulated_content:
+            start_index = accumulated_content.find("<tool_call>") + len("<tool_call>")
+            end_index = accumulated_content.find("</tool_call>")
+            return ast.literal_eval(accumulated_content[start_index:end_index].strip())
+    return None
+
+
+def incremental_parse(lines: list[str]) -> dict | None:
+    parser = StreamParser()
+    for line in lines:
+        for event in parser.feed_line(line):
+            if event["type"] == TOOL_CALL_COMPLETE:
+                return event["tool_call"]
+    return None
+
+
+def check_malformed_tool_calls():
+    for text in (
+        '{"name": "generate_image", "arguments": {"prompt": 1' + "0" * 5000 + "}}",
+        "{'name': 'generate_image', 'arguments': {'prompt': 1" + "0" * 5000 + "}}",
+        '{"name": "generate_image", "arguments": {"prompt": "a fox"}',
+        "[1, 2, 3]",
+        "{'name': 'generate_image', 'arguments': {[1]: 2}}",
+        "{'name': 'generate_image', 'arguments': {'steps': -True}}",
+    ):
+        try:
+            parse_tool_call(text)
+        except ToolCallParseError:
+            continue
+        raise AssertionError(f"Expected ToolCallParseError for {text[:60]!r}")
+    parser = StreamParser(max_tool_call_size=64)
+    events = []
+    for chunk in ("Before ", OPEN_TAG, "x" * 200, "y" * 50, CLOSE_TAG, " after"):
+        events.extend(parser.feed_text(chunk))
+    events.extend(parser.finish())
+    text = "".join(event["text"] for event in events if event["type"] == TEXT_DELTA)
+    assert text == "Before  after", text
+    assert [event["type"] for event in events].count(TOOL_CALL_ERROR) == 1
+
+
+def bench(fn, lines: list[str], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(lines)
+        best = min(best, time.perf_counter() - start)
+    assert result and result["name"] == "generate_image"
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SSE/tool-call parser benchmark.")
+    parser.add_argument("--sizes", type=str, default="10000,25000,50000,100000")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    check_malformed_tool_calls()
+    print(f"{'tokens':>8} {'legacy_ms':>10} {'incremental_ms':>15} {'speedup':>8}")
+    for size in map(int, args.sizes.split(",")):
+        lines = synthetic_stream(size)
+        legacy = bench(legacy_parse, lines, args.repeat)
+        incremental = bench(incremental_parse, lines, args.repeat)
+        print(
+            f"{size:>8} {legacy * 1000:>10.1f} {incremental * 1000:>15.1f} {legacy / incremental:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,185 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+os.chdir(ROOT)
+os.environ.setdefault("REFLEX_UPLOADED_FILES_DIR", tempfile.mkdtemp())
+
+from load_test import (
+    Results,
+    create_app,
+    drain_background_tasks,
+    percentile,
+    session,
+    start_mock,
+    use_gateway,
+)
+
+from app.services import gateway
+
+
+def _percentiles(values: list[float]) -> dict:
+    return {
+        "p50_ms": round(percentile(values, 0.5) * 1000, 2),
+        "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+    }
+
+
+async def run_worker(args: argparse.Namespace) -> dict:
+    use_gateway(args.gateway_url)
+    results = Results()
+    app = create_app(results)
+    started = time.time()
+    try:
+        await asyncio.gather(
+            *(session(app, index, args, results) for index in range(args.sessions))
+        )
+        finished = time.time()
+        await drain_background_tasks(app)
+    finally:
+        await gateway.aclose()
+        if hasattr(app.state_manager, "close"):
+            await app.state_manager.close()
+    return {
+        "manager": type(app.state_manager).__name__,
+        "started": started,
+        "finished": finished,
+        "streams": len(results.chat_duration),
+        "tokens": sum(results.chat_tokens),
+        "lock_s": results.state_lock,
+        "ttft_s": results.chat_ttft,
+        "stream_s": results.chat_duration,
+        "errors": results.errors,
+    }
+
+
+def spawn_workers(workers: int, args: argparse.Namespace) -> dict:
+    command = [
+        sys.executable,
+        __file__,
+        "--worker",
+        "--sessions",
+        str(args.sessions),
+        "--iterations",
+        str(args.iterations),
+        "--think-time",
+        str(args.think_time),
+        "--chat-model",
+        args.chat_model,
+        "--gateway-url",
+        args.gateway_url,
+    ]
+    processes = [
+        subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+        for _ in range(workers)
+    ]
+    reports = [
+        json.loads(process.communicate()[0].splitlines()[-1]) for process in processes
+    ]
+    elapsed = max(report["finished"] for report in reports) - min(
+        report["started"] for report in reports
+    )
+    streams = sum(report["streams"] for report in reports)
+    tokens = sum(report["tokens"] for report in reports)
+    errors: dict[str, int] = {}
+    for report in reports:
+        for name, count in report["errors"].items():
+            errors[name] = errors.get(name, 0) + count
+    return {
+        "workers": workers,
+        "state_manager": reports[0]["manager"],
+        "sessions": workers * args.sessions,
+        "elapsed_s": round(elapsed, 2),
+        "streams": streams,
+        "streams_per_s": round(streams / elapsed, 2),
+        "tokens_per_s": round(tokens / elapsed, 1),
+        "state_update": _percentiles(
+            [value for report in reports for value in report["lock_s"]]
+        ),
+        "ttft": _percentiles(
+            [value for report in reports for value in report["ttft_s"]]
+        ),
+        "stream": _percentiles(
+            [value for report in reports for value in report["stream_s"]]
+        ),
+        "errors": errors,
+    }
+
+
+def start_fakeredis(port: int) -> subprocess.Popen:
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-c",
+            "import sys; from fakeredis import TcpFakeServer; "
+            "TcpFakeServer(('127.0.0.1', int(sys.argv[1])), server_type='redis')"
+            ".serve_forever()",
+            str(port),
+        ]
+    )
+    time.sleep(1)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Measure chat streaming throughput from 1 to N worker processes sharing "
+            "one Redis state manager."
+        )
+    )
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--sessions", type=int, default=25, help="Sessions per worker.")
+    parser.add_argument("--iterations", type=int, default=3)
+    parser.add_argument("--think-time", type=float, default=0.0)
+    parser.add_argument("--chat-model", default="Hermes 2 Pro Mistral 7B")
+    parser.add_argument("--gateway-url", default=None)
+    parser.add_argument("--mock-port", type=int, default=8787)
+    parser.add_argument("--mock-args", default="")
+    parser.add_argument(
+        "--fakeredis",
+        type=int,
+        default=None,
+        metavar="PORT",
+        help="Share state through a fakeredis server on PORT instead of REDIS_URL.",
+    )
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.set_defaults(image_ratio=0.0, image_model="Flux-1 Schnell")
+    args = parser.parse_args()
+    if args.worker:
+        print(json.dumps(asyncio.run(run_worker(args))))
+        return
+    counts = [int(count) for count in args.workers.split(",")]
+    servers = []
+    if args.fakeredis is not None:
+        servers.append(start_fakeredis(args.fakeredis))
+        os.environ["REDIS_URL"] = f"redis://127.0.0.1:{args.fakeredis}"
+    if max(counts) > 1 and not os.getenv("REDIS_URL"):
+        parser.error("Set REDIS_URL or --fakeredis to run more than one worker.")
+    if args.gateway_url is None:
+        servers.append(start_mock(args.mock_port, args.mock_args))
+        args.gateway_url = f"http://127.0.0.1:{args.mock_port}/v1"
+    try:
+        rows = [spawn_workers(count, args) for count in counts]
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+    baseline = rows[0]["streams_per_s"] / rows[0]["workers"] or 1.0
+    for row in rows:
+        row["scaling_efficiency"] = round(
+            row["streams_per_s"] / (baseline * row["workers"]), 2
+        )
+    print(json.dumps(rows, indent=2))
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
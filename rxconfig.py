@@ -1,3 +1,11 @@
+import os
+
 import reflex as rx
 
-config = rx.Config(app_name="app")
\ No newline at end of file
+config = rx.Config(
+    app_name="app",
+    redis_url=os.getenv("REDIS_URL") or None,
+    redis_lock_expiration=int(os.getenv("REDIS_LOCK_EXPIRATION", "20000")),
+    redis_lock_warning_threshold=int(os.getenv("REDIS_LOCK_WARNING_THRESHOLD", "500")),
+    redis_token_expiration=int(os.getenv("REDIS_TOKEN_EXPIRATION", "7200")),
+)
\ No newline at end of file